@@ -0,0 +1,94 @@
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Any, Dict
+import jwt
+from gotrue.types import User, UserResponse
+from .cache import TTLCache
+from .config import supabase, AUTH_VERIFY_MODE, SUPABASE_JWT_SECRET, SUPABASE_JWT_AUDIENCE, SUPABASE_JWKS_URL, TOKEN_CACHE_TTL, TOKEN_CACHE_MAX_ENTRIES
+
+logger = logging.getLogger(__name__)
+
+SYMMETRIC_ALGORITHMS = ["HS256"]
+ASYMMETRIC_ALGORITHMS = ["RS256", "ES256"]
+#seconds of clock drift tolerated between us and the auth server
+CLOCK_SKEW_LEEWAY = 10
+
+class TokenVerificationError(Exception):
+    pass
+
+#the jwks document is fetched once and the signing keys are kept for an hour
+_jwks_client = jwt.PyJWKClient(SUPABASE_JWKS_URL, cache_keys=True, lifespan=3600) if SUPABASE_JWKS_URL else None
+
+def _signing_key(token: str):
+    header = jwt.get_unverified_header(token)
+    algorithm = header.get("alg")
+    if algorithm in SYMMETRIC_ALGORITHMS:
+        if not SUPABASE_JWT_SECRET:
+            raise TokenVerificationError("No JWT secret configured")
+        return SUPABASE_JWT_SECRET, algorithm
+    if algorithm in ASYMMETRIC_ALGORITHMS:
+        if _jwks_client is None:
+            raise TokenVerificationError("No JWKS url configured")
+        return _jwks_client.get_signing_key_from_jwt(token).key, algorithm
+    raise TokenVerificationError(f"Unsupported signing algorithm {algorithm}")
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """Check the signature, expiry and audience of a supabase access token and return its claims"""
+    try:
+        key, algorithm = _signing_key(token)
+        return jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=SUPABASE_JWT_AUDIENCE,
+            leeway=CLOCK_SKEW_LEEWAY,
+            options={"require": ["exp", "sub"]},
+        )
+    except jwt.PyJWTError as e:
+        raise TokenVerificationError(str(e)) from e
+
+def _user_from_claims(claims: Dict[str, Any]) -> UserResponse:
+    #build the same UserResponse that supabase.auth.get_user returns so routers don't care which mode ran.
+    #the token doesn't carry account timestamps, so those stay unset instead of being made up
+    user = User.model_construct(
+        id=claims["sub"],
+        aud=claims.get("aud", SUPABASE_JWT_AUDIENCE),
+        role=claims.get("role"),
+        email=claims.get("email"),
+        phone=claims.get("phone"),
+        app_metadata=claims.get("app_metadata", {}),
+        user_metadata=claims.get("user_metadata", {}),
+        is_anonymous=claims.get("is_anonymous", False),
+        created_at=None,
+    )
+    return UserResponse.model_construct(user=user)
+
+async def verify_access_token(token: str) -> UserResponse:
+    if AUTH_VERIFY_MODE == "remote":
+        user = await supabase.auth.get_user(token)
+        if not user:
+            raise TokenVerificationError("Invalid authentication credentials")
+        return user
+    #decoding may have to fetch the jwks document, keep that off the event loop
+    claims = await asyncio.to_thread(decode_access_token, token)
+    return _user_from_claims(claims)
+
+#keyed by a hash of the token so raw credentials never sit in memory as dict keys
+token_cache = TTLCache(max_entries=TOKEN_CACHE_MAX_ENTRIES, default_ttl=TOKEN_CACHE_TTL)
+
+def _cache_ttl(token: str) -> float:
+    #never keep an identity around past the token's own exp claim
+    try:
+        expires_at = jwt.decode(token, options={"verify_signature": False}).get("exp")
+    except jwt.PyJWTError:
+        return 0
+    if expires_at is None:
+        return TOKEN_CACHE_TTL
+    return min(TOKEN_CACHE_TTL, expires_at - time.time())
+
+async def authenticate(token: str) -> UserResponse:
+    """Cached, single-flight wrapper around verify_access_token"""
+    key = hashlib.sha256(token.encode()).hexdigest()
+    return await token_cache.get_or_load(key, lambda: verify_access_token(token), ttl=_cache_ttl(token))
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+from bisect import bisect_left, insort
+from typing import Any, Dict, List, Optional, Tuple
+from .config import supabase
+
+logger = logging.getLogger(__name__)
+
+PROFILES_TABLE: str = "profiles"
+PROFILE_ID: str = "id"
+SUMMARY_COLUMNS: str = "id,username,full_name,avatar_url"
+SUMMARY_FIELDS = tuple(SUMMARY_COLUMNS.split(","))
+#profiles can be matched by the start of either of these
+KEY_COLUMNS = ("username", "full_name")
+LOAD_BATCH_SIZE = 1000
+
+class PrefixIndex:
+    """Sorted (key, profile id) list for @-mention autocomplete.
+
+    A prefix lookup is a bisect to the first key >= prefix followed by a walk
+    while keys still start with it, so a query costs O(log n + limit) however
+    many profiles there are. Keys are casefolded username and full_name.
+    Summaries are kept as tuples and only turned into dicts for the results,
+    which roughly halves the memory a million profiles take.
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[str, str]] = []
+        #profile id -> values in SUMMARY_FIELDS order
+        self._profiles: Dict[str, tuple] = {}
+        self.ready = False
+        self._loading = False
+        #profiles deleted while the load is paging, so a stale page can't bring them back
+        self._removed_while_loading: set = set()
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    @staticmethod
+    def _keys_for(row: Dict[str, Any]) -> List[str]:
+        keys = set()
+        for column in KEY_COLUMNS:
+            value = row.get(column)
+            if value:
+                key = value.casefold()
+                #most usernames are already lowercase, share the string instead of a copy
+                keys.add(value if key == value else key)
+        return sorted(keys)
+
+    def _summary(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        values = self._profiles.get(profile_id)
+        return None if values is None else dict(zip(SUMMARY_FIELDS, values))
+
+    def _drop_keys(self, profile_id: str) -> None:
+        row = self._summary(profile_id)
+        if row is None:
+            return
+        for key in self._keys_for(row):
+            i = bisect_left(self._keys, (key, profile_id))
+            if i < len(self._keys) and self._keys[i] == (key, profile_id):
+                del self._keys[i]
+
+    def upsert(self, row: Dict[str, Any]) -> None:
+        profile_id = row.get(PROFILE_ID)
+        if not profile_id:
+            return
+        #partial rows (realtime updates, projected reads) only replace the columns they carry
+        summary = {**(self._summary(profile_id) or {}), **{c: row[c] for c in SUMMARY_FIELDS if c in row}}
+        self._drop_keys(profile_id)
+        self._profiles[profile_id] = tuple(summary.get(c) for c in SUMMARY_FIELDS)
+        for key in self._keys_for(summary):
+            insort(self._keys, (key, profile_id))
+
+    def remove(self, profile_id: str) -> None:
+        if self._loading:
+            self._removed_while_loading.add(profile_id)
+        self._drop_keys(profile_id)
+        self._profiles.pop(profile_id, None)
+
+    def search(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        prefix = prefix.casefold()
+        results: List[Dict[str, Any]] = []
+        seen = set()
+        i = bisect_left(self._keys, (prefix,))
+        while i < len(self._keys) and len(results) < limit:
+            key, profile_id = self._keys[i]
+            if not key.startswith(prefix):
+                break
+            if profile_id not in seen:
+                seen.add(profile_id)
+                results.append(self._summary(profile_id))
+            i += 1
+        return results
+
+    def bulk_load(self, rows: List[Dict[str, Any]]) -> None:
+        """Add many rows with one sort at the end instead of an insort per key"""
+        for row in rows:
+            profile_id = row.get(PROFILE_ID)
+            if not profile_id:
+                continue
+            self._drop_keys(profile_id)
+            self._profiles[profile_id] = tuple(row.get(c) for c in SUMMARY_FIELDS)
+            self._keys.extend((key, profile_id) for key in self._keys_for(row))
+        self._keys.sort()
+
+    def apply_change(self, change: Dict[str, Any]) -> None:
+        """Change feed listener for profiles"""
+        if change.get("table") != PROFILES_TABLE:
+            return
+        if change.get("type") == "DELETE":
+            row = change.get("old_record") or {}
+            if row.get(PROFILE_ID):
+                self.remove(row[PROFILE_ID])
+        else:
+            self.upsert(change.get("record") or {})
+
+    async def load(self, client=supabase, batch_size: int = LOAD_BATCH_SIZE) -> None:
+        rows: List[Dict[str, Any]] = []
+        after: Optional[str] = None
+        self._loading = True
+        try:
+            while True:
+                query = client.table(PROFILES_TABLE).select(SUMMARY_COLUMNS)
+                if after is not None:
+                    query = query.gt(PROFILE_ID, after)
+                result = await query.order(PROFILE_ID).limit(batch_size).execute()
+                rows.extend(result.data)
+                if len(result.data) < batch_size:
+                    break
+                after = result.data[-1][PROFILE_ID]
+        finally:
+            self._loading = False
+        #writes that arrived while paging are already in the index and newer than these rows
+        skip = self._profiles.keys() | self._removed_while_loading
+        self.bulk_load([row for row in rows if row[PROFILE_ID] not in skip])
+        self._removed_while_loading.clear()
+        self.ready = True
+        logger.info("autocomplete index loaded: %d profiles, %d keys", len(self._profiles), len(self._keys))
+
+    def start_loading(self) -> asyncio.Task:
+        task = asyncio.create_task(self.load())
+        task.add_done_callback(_log_load_failure)
+        return task
+
+    def stats(self) -> Dict[str, Any]:
+        return {"ready": self.ready, "profiles": len(self._profiles), "keys": len(self._keys)}
+
+def _log_load_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("autocomplete index failed to load, falling back to database prefix queries", exc_info=task.exception())
+
+username_index = PrefixIndex()
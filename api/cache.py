@@ -0,0 +1,165 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from .config import ENTITY_CACHE_TTLS, ENTITY_CACHE_MAX_ENTRIES
+
+_MISSING = object()
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a per-entry ttl.
+
+    get_or_load merges concurrent loads of the same key into one in-flight call,
+    so a burst of identical requests only reaches the backend once. invalidate
+    bumps the key's generation while a load is running, and a load that finishes
+    under an older generation returns its value without caching it, so a read
+    that raced a write can't park the pre-write row for a whole ttl.
+    """
+
+    def __init__(self, max_entries: int, default_ttl: float):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        #only tracked while a key has loads running: how many, and how often it was invalidated meanwhile
+        self._loading: Dict[Hashable, int] = {}
+        self._generations: Dict[Hashable, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+        if key in self._loading:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            #later readers start a fresh load instead of joining the stale one
+            self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl: Optional[float] = None) -> Any:
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self._loading[key] = self._loading.get(key, 0) + 1
+        generation = self._generations.get(key, 0)
+        try:
+            value = await loader()
+        except BaseException as e:
+            #failures are handed to everyone waiting but never cached
+            future.set_exception(e)
+            future.exception()
+            raise
+        else:
+            if self._generations.get(key, 0) == generation:
+                self.set(key, value, ttl)
+            future.set_result(value)
+            return value
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            self._loading[key] -= 1
+            if not self._loading[key]:
+                del self._loading[key]
+                self._generations.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+class EntityCache:
+    """Read-through cache for single rows, keyed by (table, id).
+
+    All tables share one LRU bound but each table has its own ttl. Writers must
+    call invalidate after a successful PUT/DELETE so the next read goes back to
+    supabase.
+    """
+
+    def __init__(self, ttls: Dict[str, float], max_entries: int):
+        self.ttls = ttls
+        self._cache = TTLCache(max_entries=max_entries, default_ttl=max(ttls.values()))
+        self._hits: Dict[str, int] = {entity: 0 for entity in ttls}
+        self._misses: Dict[str, int] = {entity: 0 for entity in ttls}
+
+    async def get_or_load(self, entity: str, entity_id: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        key = (entity, str(entity_id))
+        value = self._cache.get(key, _MISSING)
+        if value is not _MISSING:
+            self._hits[entity] += 1
+            return value
+        self._misses[entity] += 1
+        return await self._cache.get_or_load(key, loader, ttl=self.ttls[entity])
+
+    def invalidate(self, entity: str, entity_id: str) -> None:
+        self._cache.invalidate((entity, str(entity_id)))
+
+    def stats(self) -> Dict[str, Any]:
+        hits = sum(self._hits.values())
+        misses = sum(self._misses.values())
+        return {
+            "entries": len(self._cache),
+            "max_entries": self._cache.max_entries,
+            "hits": hits,
+            "misses": misses,
+            #misses that piggybacked on a load already in flight
+            "coalesced": self._cache.coalesced,
+            "evictions": self._cache.evictions,
+            "expirations": self._cache.expirations,
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+            "entities": {
+                entity: {
+                    "ttl": self.ttls[entity],
+                    "hits": self._hits[entity],
+                    "misses": self._misses[entity],
+                    "hit_ratio": self._hits[entity] / (self._hits[entity] + self._misses[entity]) if self._hits[entity] + self._misses[entity] else 0.0,
+                }
+                for entity in self.ttls
+            },
+        }
+
+entity_cache = EntityCache(ENTITY_CACHE_TTLS, ENTITY_CACHE_MAX_ENTRIES)
@@ -0,0 +1,118 @@
+import logging
+from typing import Any, Callable, Dict, List, Optional
+from .cache import EntityCache, entity_cache
+from .config import supabase, CHANGE_FEED_SOURCE
+
+logger = logging.getLogger(__name__)
+
+#table -> primary key column of the rows the entity cache holds
+CACHED_TABLE_KEYS: Dict[str, str] = {
+    "gig": "gig_id",
+    "profiles": "id",
+    "client": "client_id",
+    "gig_worker": "worker_id",
+}
+WATCHED_EVENTS = ("UPDATE", "DELETE")
+
+ChangeHandler = Callable[[Dict[str, Any]], None]
+
+class SupabaseChangeSource:
+    """postgres_changes events from supabase realtime, so writes made by any instance reach every instance"""
+
+    def __init__(self, client=supabase, channel_name: str = "cache-invalidation"):
+        self.client = client
+        self.channel_name = channel_name
+        self.channel = None
+
+    async def subscribe(self, tables: List[str], events: List[str], handler: ChangeHandler):
+        self.channel = self.client.channel(self.channel_name)
+        for table in tables:
+            for event in events:
+                self.channel.on_postgres_changes(event, callback=handler, table=table, schema="public")
+        await self.channel.subscribe()
+
+    async def close(self):
+        if self.channel:
+            await self.channel.unsubscribe()
+
+class LocalChangeSource:
+    """In-process event source with the same payload shape as realtime.
+
+    Used when there is no realtime connection (local dev, tests): call publish
+    and every subscribed handler runs synchronously.
+    """
+
+    def __init__(self):
+        self._subscriptions: List[tuple] = []
+
+    async def subscribe(self, tables: List[str], events: List[str], handler: ChangeHandler):
+        self._subscriptions.append((set(tables), set(events), handler))
+
+    def publish(self, table: str, event: str, record: Optional[dict] = None, old_record: Optional[dict] = None):
+        payload = {"data": {"schema": "public", "table": table, "type": event, "record": record or {}, "old_record": old_record or {}}}
+        for tables, events, handler in self._subscriptions:
+            if table in tables and event in events:
+                handler(payload)
+
+    async def close(self):
+        self._subscriptions.clear()
+
+class ChangeFeed:
+    """Evicts entity cache entries when a row changes anywhere.
+
+    Other in-process indexes can hook in with add_listener to see the same
+    normalized events (table, type, record, old_record).
+    """
+
+    def __init__(self, source, cache: EntityCache = entity_cache, table_keys: Dict[str, str] = CACHED_TABLE_KEYS):
+        self.source = source
+        self.cache = cache
+        self.table_keys = dict(table_keys)
+        self.events = set(WATCHED_EVENTS)
+        self._listeners: List[ChangeHandler] = []
+        self.received = 0
+        self.evicted = 0
+
+    def watch(self, table: str, key_column: Optional[str] = None, events=WATCHED_EVENTS):
+        """Subscribe to another table. key_column is only needed if the entity cache holds it."""
+        if key_column:
+            self.table_keys[table] = key_column
+        else:
+            self.table_keys.setdefault(table, None)
+        self.events.update(events)
+
+    def add_listener(self, listener: ChangeHandler):
+        self._listeners.append(listener)
+
+    async def start(self):
+        await self.source.subscribe(list(self.table_keys), sorted(self.events), self.handle)
+
+    async def stop(self):
+        await self.source.close()
+
+    def handle(self, payload: Dict[str, Any]):
+        change = payload.get("data", payload)
+        table = change.get("table")
+        self.received += 1
+        key_column = self.table_keys.get(table)
+        if key_column:
+            #old_record carries the primary key on DELETE, record has it on UPDATE
+            for row in (change.get("old_record"), change.get("record")):
+                if row and row.get(key_column) is not None:
+                    self.cache.invalidate(table, row[key_column])
+                    self.evicted += 1
+        for listener in self._listeners:
+            try:
+                listener(change)
+            except Exception:
+                logger.exception("change feed listener failed for %s", table)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"source": type(self.source).__name__, "received": self.received, "evicted": self.evicted}
+
+def _make_source():
+    if CHANGE_FEED_SOURCE == "local":
+        return LocalChangeSource()
+    return SupabaseChangeSource()
+
+change_feed = ChangeFeed(_make_source())
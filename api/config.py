@@ -1,10 +1,41 @@
 import os
-from supabase import create_client, Client
+from supabase import AsyncClient, AsyncClientOptions
 from dotenv import load_dotenv
 
 load_dotenv()
 
 SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("SUPABASE_ANON_KEY")
+#the .env files historically spelled this SUPABABSE_JWT_SECRET, accept both
+SUPABASE_JWT_SECRET = os.environ.get("SUPABASE_JWT_SECRET") or os.environ.get("SUPABABSE_JWT_SECRET")
+#"local" verifies bearer tokens in process, "remote" asks the supabase auth server every time
+AUTH_VERIFY_MODE = os.environ.get("AUTH_VERIFY_MODE", "local")
+SUPABASE_JWT_AUDIENCE = os.environ.get("SUPABASE_JWT_AUDIENCE", "authenticated")
+#asymmetric signing keys are published here for projects that have moved off the shared secret
+SUPABASE_JWKS_URL = os.environ.get("SUPABASE_JWKS_URL") or (f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json" if SUPABASE_URL else None)
+#verified identities are reused until the token expires or this many seconds pass
+TOKEN_CACHE_TTL = int(os.environ.get("TOKEN_CACHE_TTL", 300))
+TOKEN_CACHE_MAX_ENTRIES = int(os.environ.get("TOKEN_CACHE_MAX_ENTRIES", 10000))
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+#read-through cache for the hottest single row endpoints, seconds per table
+ENTITY_CACHE_TTLS = {
+    "gig": float(os.environ.get("GIG_CACHE_TTL", 30)),
+    "profiles": float(os.environ.get("PROFILE_CACHE_TTL", 60)),
+    "client": float(os.environ.get("EMPLOYER_CACHE_TTL", 60)),
+    "gig_worker": float(os.environ.get("GIG_WORKER_CACHE_TTL", 60)),
+}
+#where row change events come from: "supabase" (realtime), "local" (in-process only) or "off"
+CHANGE_FEED_SOURCE = os.environ.get("CHANGE_FEED_SOURCE", "supabase")
+ENTITY_CACHE_MAX_ENTRIES = int(os.environ.get("ENTITY_CACHE_MAX_ENTRIES", 5000))
+#likes and reactions are buffered and written in bulk once this many are pending or this many seconds pass
+INTERACTION_FLUSH_SIZE = int(os.environ.get("INTERACTION_FLUSH_SIZE", 500))
+INTERACTION_FLUSH_INTERVAL = float(os.environ.get("INTERACTION_FLUSH_INTERVAL", 1.0))
+
+POSTGREST_TIMEOUT = float(os.environ.get("POSTGREST_TIMEOUT", 10))
+
+#one async client per process. postgrest reuses a single httpx session for every query,
+#so connections are pooled and kept alive (http2) instead of blocking the event loop per request
+supabase: AsyncClient = AsyncClient(SUPABASE_URL, SUPABASE_KEY, options=AsyncClientOptions(postgrest_client_timeout=POSTGREST_TIMEOUT))
+
+async def close_supabase():
+    await supabase.postgrest.aclose()
@@ -0,0 +1,39 @@
+import hashlib
+from typing import Any, Optional
+import orjson
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+
+#clients may keep the body but have to revalidate it with If-None-Match every time
+CACHE_CONTROL = "private, no-cache"
+
+def version_etag(table: str, row_id: Any, updated_at: str) -> str:
+    """ETag from a row's updated_at, cheap enough to check with a one column probe"""
+    digest = hashlib.sha1(f"{table}:{row_id}:{updated_at}".encode()).hexdigest()
+    return f'"{digest}"'
+
+def content_etag(body: Any) -> str:
+    digest = hashlib.sha1(orjson.dumps(body, option=orjson.OPT_SORT_KEYS)).hexdigest()
+    return f'"{digest}"'
+
+def etag_for(table: str, row_id: Any, row: dict, whole_row: bool = True) -> str:
+    #updated_at only versions the whole row, sparse or expanded bodies hash their content
+    if whole_row and row.get("updated_at"):
+        return version_etag(table, row_id, row["updated_at"])
+    return content_etag(row)
+
+def if_none_match(request: Request, etag: Optional[str]) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header or not etag:
+        return False
+    if header.strip() == "*":
+        return True
+    #If-None-Match uses the weak comparison, so W/"x" matches "x"
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag in candidates
+
+def etag_response(request: Request, body: Any, etag: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if if_none_match(request, etag):
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(body, headers=headers)
@@ -0,0 +1,180 @@
+import asyncio
+import heapq
+import logging
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+from .config import supabase
+
+logger = logging.getLogger(__name__)
+
+FOLLOWS_TABLE: str = "follows"
+FOLLOWER_ID: str = "follower_id"
+FOLLOWED_ID: str = "followed_id"
+GIGWORKER_TABLE: str = "gig_worker"
+#postgrest caps a response at 1000 rows by default
+LOAD_BATCH_SIZE = 1000
+#a shared specialty is worth this many mutual follows
+SPECIALTY_BONUS = 2.0
+
+class FollowGraph:
+    """In-memory copy of the follows table for suggestions.
+
+    Profile ids are interned to small ints so each adjacency set holds ints
+    instead of uuid strings. The routes keep it current on create/delete
+    follow and the change feed applies writes made by other instances, so
+    after the initial load it never has to go back to supabase.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._following: List[Set[int]] = []
+        self._followers: List[Set[int]] = []
+        self._specialty: Dict[int, str] = {}
+        self.edges = 0
+        self.ready = False
+        self._loading = False
+        #unfollows that land while the load is paging, replayed once it finishes
+        self._removed_while_loading: Set[Tuple[str, str]] = set()
+
+    def _intern(self, profile_id: str) -> int:
+        node = self._ids.get(profile_id)
+        if node is None:
+            node = len(self._names)
+            self._ids[profile_id] = node
+            self._names.append(profile_id)
+            self._following.append(set())
+            self._followers.append(set())
+        return node
+
+    def add(self, follower_id: str, followed_id: str) -> None:
+        if follower_id == followed_id:
+            return
+        if self._loading:
+            self._removed_while_loading.discard((follower_id, followed_id))
+        follower, followed = self._intern(follower_id), self._intern(followed_id)
+        if followed not in self._following[follower]:
+            self._following[follower].add(followed)
+            self._followers[followed].add(follower)
+            self.edges += 1
+
+    def remove(self, follower_id: str, followed_id: str) -> None:
+        if self._loading:
+            self._removed_while_loading.add((follower_id, followed_id))
+        follower, followed = self._ids.get(follower_id), self._ids.get(followed_id)
+        if follower is None or followed is None or followed not in self._following[follower]:
+            return
+        self._following[follower].discard(followed)
+        self._followers[followed].discard(follower)
+        self.edges -= 1
+
+    def set_specialty(self, profile_id: str, specialty: Optional[str]) -> None:
+        node = self._intern(profile_id)
+        if specialty:
+            self._specialty[node] = specialty
+        else:
+            self._specialty.pop(node, None)
+
+    def is_following(self, follower_id: str, followed_id: str) -> bool:
+        follower, followed = self._ids.get(follower_id), self._ids.get(followed_id)
+        return follower is not None and followed is not None and followed in self._following[follower]
+
+    def following(self, profile_id: str) -> List[str]:
+        node = self._ids.get(profile_id)
+        if node is None:
+            return []
+        return [self._names[i] for i in self._following[node]]
+
+    def suggest(self, profile_id: str, k: int = 10) -> List[Dict[str, Any]]:
+        """Top k profiles followed by the people profile_id follows, that it doesn't follow yet.
+
+        Score is the number of mutual connections plus SPECIALTY_BONUS when the
+        candidate shares the viewer's main job specialty.
+        """
+        node = self._ids.get(profile_id)
+        if node is None:
+            return []
+        following = self._following[node]
+        mutuals: Counter = Counter()
+        for followee in following:
+            #Counter.update over a set runs in C, this loop is the whole cost of a suggestion
+            mutuals.update(self._following[followee])
+        mutuals.pop(node, None)
+        for followee in following:
+            mutuals.pop(followee, None)
+
+        specialty = self._specialty.get(node)
+        def score(item):
+            candidate, count = item
+            if specialty is not None and self._specialty.get(candidate) == specialty:
+                return count + SPECIALTY_BONUS
+            return float(count)
+        top = heapq.nlargest(k, mutuals.items(), key=score)
+        return [{"profile_id": self._names[c], "mutual_count": count, "score": score((c, count))} for c, count in top]
+
+    def apply_change(self, change: Dict[str, Any]) -> None:
+        """Change feed listener, follows rows and gig_worker specialties"""
+        table = change.get("table")
+        if table == FOLLOWS_TABLE:
+            if change.get("type") == "INSERT":
+                row = change.get("record") or {}
+                if row.get(FOLLOWER_ID) and row.get(FOLLOWED_ID):
+                    self.add(row[FOLLOWER_ID], row[FOLLOWED_ID])
+            elif change.get("type") == "DELETE":
+                row = change.get("old_record") or {}
+                if row.get(FOLLOWER_ID) and row.get(FOLLOWED_ID):
+                    self.remove(row[FOLLOWER_ID], row[FOLLOWED_ID])
+        elif table == GIGWORKER_TABLE:
+            row = change.get("record") or {}
+            if row.get("user_id"):
+                self.set_specialty(row["user_id"], row.get("main_job_specialty"))
+
+    async def load(self, client=supabase, batch_size: int = LOAD_BATCH_SIZE) -> None:
+        """Page through follows and gig_worker specialties, then mark the graph ready"""
+        self._loading = True
+        try:
+            after: Optional[Tuple[str, str]] = None
+            while True:
+                query = client.table(FOLLOWS_TABLE).select(f"{FOLLOWER_ID},{FOLLOWED_ID}")
+                if after is not None:
+                    query = query.or_(f"{FOLLOWER_ID}.gt.{after[0]},and({FOLLOWER_ID}.eq.{after[0]},{FOLLOWED_ID}.gt.{after[1]})")
+                result = await query.order(FOLLOWER_ID).order(FOLLOWED_ID).limit(batch_size).execute()
+                for row in result.data:
+                    self.add(row[FOLLOWER_ID], row[FOLLOWED_ID])
+                if len(result.data) < batch_size:
+                    break
+                after = (result.data[-1][FOLLOWER_ID], result.data[-1][FOLLOWED_ID])
+
+            after_user = None
+            while True:
+                query = client.table(GIGWORKER_TABLE).select("user_id,main_job_specialty").not_.is_("user_id", "null")
+                if after_user is not None:
+                    query = query.gt("user_id", after_user)
+                result = await query.order("user_id").limit(batch_size).execute()
+                for row in result.data:
+                    self.set_specialty(row["user_id"], row.get("main_job_specialty"))
+                if len(result.data) < batch_size:
+                    break
+                after_user = result.data[-1]["user_id"]
+        finally:
+            self._loading = False
+        #a page fetched before an unfollow may have put the edge back
+        for follower_id, followed_id in self._removed_while_loading:
+            self.remove(follower_id, followed_id)
+        self._removed_while_loading.clear()
+        self.ready = True
+        logger.info("follow graph loaded: %d profiles, %d edges", len(self._names), self.edges)
+
+    def start_loading(self) -> asyncio.Task:
+        task = asyncio.create_task(self.load())
+        task.add_done_callback(_log_load_failure)
+        return task
+
+    def stats(self) -> Dict[str, Any]:
+        return {"ready": self.ready, "profiles": len(self._names), "edges": self.edges}
+
+def _log_load_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("follow graph failed to load, suggestions stay unavailable", exc_info=task.exception())
+
+follow_graph = FollowGraph()
@@ -0,0 +1,199 @@
+import asyncio
+import heapq
+import logging
+import math
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+from .config import supabase
+
+logger = logging.getLogger(__name__)
+
+GIG_TABLE: str = "gig"
+GIG_ID: str = "gig_id"
+EARTH_RADIUS_KM = 6371.0088
+#about 11 km north-south, a 10-50 km search touches a handful of cells
+CELL_DEGREES = 0.1
+LOAD_BATCH_SIZE = 1000
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+class GeoIndex:
+    """Grid of published gig locations for radius and bounding box search.
+
+    Points are bucketed into CELL_DEGREES square cells. A search takes the cells
+    its bounding box overlaps, visits them closest first and stops once the next
+    cell can't beat the limit-th best distance found so far, so a top-N query in
+    a dense city reads a few cells instead of every gig in the radius. Longitude
+    cells wrap around the antimeridian.
+    """
+
+    def __init__(self, cell_degrees: float = CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self._columns = round(360 / cell_degrees)
+        self._cells: Dict[Tuple[int, int], Set[str]] = defaultdict(set)
+        self._points: Dict[str, Tuple[float, float]] = {}
+        self.ready = False
+        self._loading = False
+        #gigs removed while the load is paging, so a stale page can't bring them back
+        self._removed_while_loading: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_degrees), math.floor((lng + 180) / self.cell_degrees) % self._columns
+
+    def add(self, gig_id: str, lat: float, lng: float) -> None:
+        self.remove(gig_id, loading_safe=False)
+        self._points[gig_id] = (lat, lng)
+        self._cells[self._cell(lat, lng)].add(gig_id)
+
+    def remove(self, gig_id: str, loading_safe: bool = True) -> None:
+        if loading_safe and self._loading:
+            self._removed_while_loading.add(gig_id)
+        point = self._points.pop(gig_id, None)
+        if point is None:
+            return
+        cell = self._cell(*point)
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.discard(gig_id)
+            if not bucket:
+                del self._cells[cell]
+
+    def apply_row(self, row: Dict[str, Any]) -> None:
+        """Index or drop a gig from a full row, only published gigs with coordinates are searchable"""
+        gig_id = row.get(GIG_ID)
+        if not gig_id:
+            return
+        if row.get("is_published") and row.get("latitude") is not None and row.get("longitude") is not None:
+            if self._loading:
+                self._removed_while_loading.discard(gig_id)
+            self.add(gig_id, float(row["latitude"]), float(row["longitude"]))
+        else:
+            self.remove(gig_id)
+
+    def _cells_in(self, min_lat: float, max_lat: float, min_lng: float, max_lng: float):
+        lat_lo, lat_hi = math.floor(min_lat / self.cell_degrees), math.floor(max_lat / self.cell_degrees)
+        lng_lo = math.floor((min_lng + 180) / self.cell_degrees)
+        lng_hi = math.floor((max_lng + 180) / self.cell_degrees)
+        #a box that wraps the whole globe visits every column once
+        columns = range(lng_lo, lng_hi + 1) if lng_hi - lng_lo < self._columns else range(self._columns)
+        for y in range(lat_lo, lat_hi + 1):
+            for x in columns:
+                cell = (y, x % self._columns)
+                if cell in self._cells:
+                    yield cell
+
+    def _cell_distance_km(self, cell: Tuple[int, int], lat: float, lng: float) -> float:
+        """Lower bound on the distance from the point to anything in the cell"""
+        size = self.cell_degrees
+        south, west = cell[0] * size, cell[1] * size - 180
+        nearest_lat = min(max(lat, south), south + size)
+        #longitude offset into the cell, going whichever way round the globe is shorter
+        offset = (lng - west) % 360
+        if offset <= size:
+            nearest_lng = lng
+        elif offset - size < 360 - offset:
+            nearest_lng = west + size
+        else:
+            nearest_lng = west
+        #the clamped point is within a hair of the true nearest point for cells this small
+        return haversine_km(lat, lng, nearest_lat, nearest_lng) * 0.99
+
+    def _closest(self, cells, lat: float, lng: float, limit: int, radius_km: float = math.inf, accept=None) -> List[Tuple[str, float]]:
+        ordered = sorted((self._cell_distance_km(cell, lat, lng), cell) for cell in cells)
+        #max heap of the best limit hits as (-distance, gig_id)
+        best: List[Tuple[float, str]] = []
+        for cell_distance, cell in ordered:
+            if cell_distance > radius_km or (len(best) == limit and cell_distance > -best[0][0]):
+                break
+            for gig_id in self._cells[cell]:
+                point = self._points[gig_id]
+                if accept is not None and not accept(point):
+                    continue
+                distance = haversine_km(lat, lng, point[0], point[1])
+                if distance > radius_km:
+                    continue
+                if len(best) < limit:
+                    heapq.heappush(best, (-distance, gig_id))
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, (-distance, gig_id))
+        return [(gig_id, -negative) for negative, gig_id in sorted(best, reverse=True)]
+
+    def nearby(self, lat: float, lng: float, radius_km: float, limit: int) -> List[Tuple[str, float]]:
+        """Up to limit (gig_id, distance_km) within radius_km of the point, closest first"""
+        dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+        min_lat, max_lat = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+        #longitude degrees shrink with latitude, near a pole the box spans every longitude
+        widest = max(abs(min_lat), abs(max_lat))
+        if widest >= 89.9:
+            min_lng, max_lng = -180.0, 180.0
+        else:
+            dlng = dlat / math.cos(math.radians(widest))
+            min_lng, max_lng = lng - dlng, lng + dlng
+        return self._closest(self._cells_in(min_lat, max_lat, min_lng, max_lng), lat, lng, limit, radius_km)
+
+    def within(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+               lat: float, lng: float, limit: int) -> List[Tuple[str, float]]:
+        """Up to limit (gig_id, distance_km) inside the box, closest to (lat, lng) first.
+
+        min_lng > max_lng is a box that crosses the antimeridian.
+        """
+        span_lng = max_lng - min_lng if max_lng >= min_lng else max_lng + 360 - min_lng
+        def inside(point):
+            return min_lat <= point[0] <= max_lat and (point[1] - min_lng) % 360 <= span_lng
+        return self._closest(self._cells_in(min_lat, max_lat, min_lng, min_lng + span_lng), lat, lng, limit, accept=inside)
+
+    def apply_change(self, change: Dict[str, Any]) -> None:
+        """Change feed listener for gig rows"""
+        if change.get("table") != GIG_TABLE:
+            return
+        if change.get("type") == "DELETE":
+            row = change.get("old_record") or {}
+            if row.get(GIG_ID):
+                self.remove(row[GIG_ID])
+        else:
+            self.apply_row(change.get("record") or {})
+
+    async def load(self, client=supabase, batch_size: int = LOAD_BATCH_SIZE) -> None:
+        self._loading = True
+        try:
+            after: Optional[str] = None
+            while True:
+                query = client.table(GIG_TABLE).select(f"{GIG_ID},latitude,longitude").eq("is_published", True) \
+                    .not_.is_("latitude", "null").not_.is_("longitude", "null")
+                if after is not None:
+                    query = query.gt(GIG_ID, after)
+                result = await query.order(GIG_ID).limit(batch_size).execute()
+                for row in result.data:
+                    #a write that arrived while paging is newer than this page
+                    if row[GIG_ID] not in self._points and row[GIG_ID] not in self._removed_while_loading:
+                        self.add(row[GIG_ID], float(row["latitude"]), float(row["longitude"]))
+                if len(result.data) < batch_size:
+                    break
+                after = result.data[-1][GIG_ID]
+        finally:
+            self._loading = False
+        self._removed_while_loading.clear()
+        self.ready = True
+        logger.info("geo index loaded: %d gigs in %d cells", len(self._points), len(self._cells))
+
+    def start_loading(self) -> asyncio.Task:
+        task = asyncio.create_task(self.load())
+        task.add_done_callback(_log_load_failure)
+        return task
+
+    def stats(self) -> Dict[str, Any]:
+        return {"ready": self.ready, "gigs": len(self._points), "cells": len(self._cells)}
+
+def _log_load_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("geo index failed to load, falling back to database bounding boxes", exc_info=task.exception())
+
+gig_geo_index = GeoIndex()
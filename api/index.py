@@ -2,8 +2,16 @@ from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 from fastapi import Depends, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from .config import supabase
-from .routes import profiles, employers, gig_workers, gigs, applications, documents, financial, posts, postInteractions, follows
+from fastapi.responses import ORJSONResponse
+from .config import supabase, close_supabase, CHANGE_FEED_SOURCE
+from .auth import authenticate, token_cache
+from .cache import entity_cache
+from .changefeed import change_feed
+from .follow_graph import follow_graph
+from .write_behind import interaction_buffer
+from .autocomplete import username_index
+from .geo_index import gig_geo_index
+from .routes import profiles, employers, gig_workers, gigs, applications, documents, financial, posts, postInteractions, follows, search
 from .models.authSchemaas import UserCredentials
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 
@@ -15,15 +23,44 @@ from .routes.messaging import router as messaging_router, Message, get_topics, g
 async def lifespan(app: FastAPI):
     # Startup event logic
     print("Application startup - Initializing messaging services")
+    #follows made through other instances reach the suggestion graph through the change feed
+    change_feed.watch("follows", events=("INSERT", "DELETE"))
+    change_feed.add_listener(follow_graph.apply_change)
+    #new profiles too, not only the updates and deletes the entity cache needs
+    change_feed.watch("profiles", "id", events=("INSERT", "UPDATE", "DELETE"))
+    change_feed.add_listener(username_index.apply_change)
+    change_feed.watch("gig", "gig_id", events=("INSERT", "UPDATE", "DELETE"))
+    change_feed.add_listener(gig_geo_index.apply_change)
+    if CHANGE_FEED_SOURCE != "off":
+        try:
+            await change_feed.start()
+        except Exception as e:
+            #without the feed other instances' writes only show up after the cache ttl
+            print(f"Change feed unavailable, relying on cache ttls: {str(e)}")
+    #built in the background, /follows/{id}/suggestions answers 503 until it is ready
+    graph_loading = follow_graph.start_loading()
+    #autocomplete uses a database prefix query until this finishes
+    autocomplete_loading = username_index.start_loading()
+    #nearby / within use a database bounding box until this finishes
+    geo_loading = gig_geo_index.start_loading()
+    interaction_buffer.start()
     yield
     # Shutdown event logic
     print("Application shutdown - Cleaning up messaging resources")
+    graph_loading.cancel()
+    autocomplete_loading.cancel()
+    geo_loading.cancel()
+    #write out buffered likes before the connection pool goes away
+    await interaction_buffer.stop()
+    await change_feed.stop()
+    await close_supabase()
 
 # Initialize FastAPI app with lifespan
 app = FastAPI(
     docs_url="/api/docs", 
     openapi_url="/api/openapi.json",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -37,21 +74,16 @@ app.add_middleware(
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/token")
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     try:
-        user = supabase.auth.get_user(token)
-        print(user)
-        if user:
-            return user
-        else:
-            raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+        return await authenticate(token)
     except Exception as e:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
 
 @app.post("/api/signup")
 async def sign_up(credentials: UserCredentials):
     try:
-        user = supabase.auth.sign_up({"email": credentials.email, "password": credentials.password})
+        user = await supabase.auth.sign_up({"email": credentials.email, "password": credentials.password})
         return {"message": "User signed up successfully", "user": user}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -59,7 +91,7 @@ async def sign_up(credentials: UserCredentials):
 @app.post("/api/token")
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     try:
-        user = supabase.auth.sign_in_with_password({"email": form_data.username, "password": form_data.password})
+        user = await supabase.auth.sign_in_with_password({"email": form_data.username, "password": form_data.password})
         # print(user)
         access_token = user.session.access_token
         return {"access_token": access_token, "token_type": "bearer"}
@@ -69,7 +101,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
 @app.post("/api/signout")
 async def sign_out(token: str = Depends(oauth2_scheme)):
     try:
-        supabase.auth.sign_out()
+        await supabase.auth.sign_out()
         return {"message": "User signed out successfully"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -79,7 +111,7 @@ async def sign_out(token: str = Depends(oauth2_scheme)):
 async def get_session(token: str = Depends(oauth2_scheme)):
     try:
         # Get the session using the token
-        response = supabase.auth.get_user(token)
+        response = await authenticate(token)
         return {
             "profile_id": response.user.id,
             # Add any other session data you need
@@ -87,6 +119,10 @@ async def get_session(token: str = Depends(oauth2_scheme)):
     except Exception as e:
         raise HTTPException(status_code=401, detail="Invalid authentication token")
     
+@app.get("/api/metrics/cache")
+async def get_cache_metrics(current_user=Depends(get_current_user)):
+    return {"tokens": token_cache.stats(), "entities": entity_cache.stats(), "follow_graph": follow_graph.stats(), "interactions": interaction_buffer.stats(), "autocomplete": username_index.stats(), "geo": gig_geo_index.stats(), "change_feed": change_feed.stats()}
+
 # Include existing routers
 app.include_router(profiles.router, prefix="/api", dependencies=[Depends(get_current_user)])
 app.include_router(employers.router, prefix="/api", dependencies=[Depends(get_current_user)])
@@ -98,6 +134,7 @@ app.include_router(financial.router, prefix="/api", dependencies=[Depends(get_cu
 app.include_router(posts.router, prefix="/api", dependencies=[Depends(get_current_user)])
 app.include_router(postInteractions.router, prefix="/api", dependencies=[Depends(get_current_user)])
 app.include_router(follows.router, prefix="/api", dependencies=[Depends(get_current_user)])
+app.include_router(search.router, prefix="/api", dependencies=[Depends(get_current_user)])
 
 # Include the messaging router - API requires authentication
 app.include_router(messaging_router, prefix="/api", dependencies=[Depends(get_current_user)])
@@ -1,15 +1,18 @@
-from pydantic import BaseModel, field_serializer, field_validator
+from pydantic import field_validator
 from uuid import UUID
 from datetime import datetime
 from typing import Optional
 from enum import Enum
+from .gigSchema import responseGigSchema
+from .gigWorkerSchemas import ResponseGigWorkerSchema
+from .baseDBmodels import BaseDBModel
 
 class ApplicationStatus(str, Enum):
     in_progress = "in_progress"
     completed = "completed"
     #might need to change later
 
-class BaseApplicationSchema(BaseModel):
+class BaseApplicationSchema(BaseDBModel):
     application_id: Optional[UUID] = None 
     created_at: datetime = None
     status: ApplicationStatus = None
@@ -21,31 +24,6 @@ class BaseApplicationSchema(BaseModel):
     gig_id: UUID = None
     worker_id: UUID = None
 
-    @field_serializer('application_id')
-    def serialize_application_id(self, application_id: UUID) -> str:
-        return str(application_id)
-    
-    @field_serializer('created_at')
-    def serialize_created_at(self, created_at: datetime) -> str:
-        return created_at.isoformat()
-    
-    @field_serializer('submitted_at')
-    def serialize_submitted_at(self, submitted_at: datetime) -> str:
-        return submitted_at.isoformat()
-    
-    @field_serializer('updated_at')
-    def serialize_updated_at(self, updated_at: datetime) -> str:
-        return updated_at.isoformat()
-    
-    @field_serializer('gig_id')
-    def serialize_gig_id(self, gig_id: UUID) -> str:
-        return str(gig_id)
-    
-    @field_serializer('worker_id')
-    def serialize_worker_id(self, worker_id: UUID) -> str:
-        return str(worker_id)
-    
-
 class CreateApplicationSchema(BaseApplicationSchema):
     #application_id is auto generated by supabase
     pass
@@ -53,14 +31,8 @@ class CreateApplicationSchema(BaseApplicationSchema):
 class UpdateApplicationSchema(BaseApplicationSchema):
     application_id: UUID = None
 
-    @field_serializer('application_id')
-    def serialize_application_id(self, application_id: UUID) -> str:
-        return str(application_id)
-    
 class ResponseApplicationSchema(BaseApplicationSchema):
     application_id: UUID = None
-
-    @field_serializer('application_id')
-    def serialize_application_id(self, application_id: UUID) -> str:
-        return str(application_id)
-
+    #only present when the request asks for ?expand=gig / ?expand=worker
+    gig: Optional[responseGigSchema] = None
+    worker: Optional[ResponseGigWorkerSchema] = None
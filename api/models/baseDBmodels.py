@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+class BaseDBModel(BaseModel):
+    """Base for the table schemas.
+
+    pydantic-core already turns UUID, datetime, date and enum fields into json
+    natively, so instead of a field_serializer per column, model_dump defaults to
+    json mode and the result can be handed straight to supabase.
+    """
+
+    def model_dump(self, **kwargs):
+        kwargs.setdefault("mode", "json")
+        return super().model_dump(**kwargs)
@@ -0,0 +1,9 @@
+from pydantic import BaseModel, Field
+from typing import List
+from uuid import UUID
+
+#enough for a screen of cards, keeps the in_() filter inside the url length limit
+MAX_BATCH_IDS: int = 100
+
+class BatchIdsSchema(BaseModel):
+    ids: List[UUID] = Field(min_length=1, max_length=MAX_BATCH_IDS)
@@ -1,21 +1,14 @@
-from pydantic import BaseModel, field_serializer, field_validator, model_validator
+from pydantic import field_validator, model_validator
 from uuid import UUID
 from datetime import datetime
 from typing import Optional
 from enum import Enum
+from .baseDBmodels import BaseDBModel
 
-class BaseFollowSchema(BaseModel):
+class BaseFollowSchema(BaseDBModel):
     followed_id: UUID = None
     follower_id: UUID = None
 
-    @field_serializer('followed_id')
-    def serialize_following_id(self, followed_id: UUID) -> str:
-        return str(followed_id)
-    
-    @field_serializer('follower_id')
-    def serialize_follower_id(self, follower_id: UUID) -> str:
-        return str(follower_id)
-
 class CreateFollowSchema(BaseFollowSchema):
     pass
 
@@ -25,18 +18,31 @@ class UpdateFollowSchema(BaseFollowSchema):
 class ReturnFollowSchema(BaseFollowSchema):
     pass
 
-class FollowerCountSchema(BaseModel):
+#the few profile columns a follower list needs to render a row
+class FollowProfileSummarySchema(BaseDBModel):
+    username: Optional[str] = None
+    full_name: Optional[str] = None
+    avatar_url: Optional[str] = None
+
+class ReturnFollowWithProfileSchema(BaseFollowSchema):
+    #the other side of the follow, the follower on /followed and the followed profile on /following
+    profile: Optional[FollowProfileSummarySchema] = None
+
+class FollowerCountSchema(BaseDBModel):
     follower_id: UUID = None
     follower_count: int = 0
 
-    @field_serializer('follower_id')
-    def serialize_follower_id(self, follower_id: UUID) -> str:
-        return str(follower_id)
-    
-class FollowedCountSchema(BaseModel):
+class FollowedCountSchema(BaseDBModel):
     followed_id: UUID = None
     followed_count: int = 0
 
-    @field_serializer('followed_id')
-    def serialize_follower_id(self, followed_id: UUID) -> str:
-        return str(followed_id)
+class FollowSuggestionSchema(BaseDBModel):
+    profile_id: UUID = None
+    #how many of the viewer's followees follow this profile
+    mutual_count: int = 0
+    score: float = 0
+
+#how the viewer and one other profile are connected
+class RelationshipSchema(BaseDBModel):
+    following: bool = False
+    followed_by: bool = False
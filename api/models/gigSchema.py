@@ -1,8 +1,10 @@
 from enum import Enum
-from pydantic import BaseModel, field_serializer, field_validator
+from pydantic import field_validator, model_validator
 from uuid import UUID
 from datetime import datetime, date
-from typing import Optional, Dict
+from typing import Any, Optional, Dict, Tuple
+from .employersSchemas import ResponseEmployerSchema
+from .baseDBmodels import BaseDBModel
 
 class gigStatus(str, Enum):
     #draft and open refer to the status of the posting
@@ -13,9 +15,33 @@ class gigStatus(str, Enum):
     #means the gig has been accepted and is in progress or completed
     in_progress = "in-progress"
     completed = "completed"
-    
 
-class baseGigSchema(BaseModel):
+#the spellings of a point the app has been sending in location
+LATITUDE_KEYS = ("lat", "latitude")
+LONGITUDE_KEYS = ("lng", "lon", "long", "longitude")
+
+def coordinates_from_location(location: Any) -> Optional[Tuple[float, float]]:
+    """(latitude, longitude) from a free-form location dict, None if it doesn't hold a valid point"""
+    if not isinstance(location, dict):
+        return None
+    #geojson point, coordinates are [longitude, latitude]
+    coordinates = location.get("coordinates")
+    if isinstance(coordinates, (list, tuple)) and len(coordinates) >= 2:
+        lng, lat = coordinates[0], coordinates[1]
+    elif isinstance(coordinates, dict):
+        return coordinates_from_location(coordinates)
+    else:
+        lat = next((location[k] for k in LATITUDE_KEYS if location.get(k) is not None), None)
+        lng = next((location[k] for k in LONGITUDE_KEYS if location.get(k) is not None), None)
+    try:
+        lat, lng = float(lat), float(lng)
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+class baseGigSchema(BaseDBModel):
     gig_id: Optional[UUID] = None
     created_at: datetime = None
     title: str = None
@@ -34,27 +60,18 @@ class baseGigSchema(BaseModel):
     company_review: str = ""
     gig_worker_rating: float = 0.00
     gig_worker_review: str = ""
+    #normalized out of location so gigs can be searched by distance, don't set directly
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
-
-    @field_serializer('created_at')
-    def serialize_worker_id(self, created_at: datetime) -> str:
-        return str(created_at)
-    
-
-    
-    @field_serializer('client_id')
-    def serialize_client_id(self, client_id: UUID) -> str:
-        return str(client_id)
-
-    @field_serializer('start_date')
-    def serialize_start_date(self, start_date: date) -> str:
-        return str(start_date)
-        
-    @field_serializer('end_date')
-    def serialize_end_date(self, end_date: date) -> str:
-        return str(end_date)
-
-
+    @model_validator(mode='before')
+    @classmethod
+    def normalize_coordinates(cls, data: Any) -> Any:
+        if isinstance(data, dict) and data.get('location') is not None and data.get('latitude') is None:
+            #a location without a usable point clears the old coordinates on update
+            point = coordinates_from_location(data['location']) or (None, None)
+            data = {**data, 'latitude': point[0], 'longitude': point[1]}
+        return data
 
 class createGigSchema(baseGigSchema):
     #gig_id is auto generated by supabase
@@ -62,16 +79,12 @@ class createGigSchema(baseGigSchema):
 
 class updateGigSchema(baseGigSchema):
     gig_id: UUID = None
-    @field_serializer('gig_id')
-    def serialize_user_id(self, gig_id: UUID) -> str:
-        return str(gig_id)
-    
 
 class responseGigSchema(baseGigSchema):
     gig_id: UUID = None
-    @field_serializer('gig_id')
-    def serialize_gig_id(self, gig_id: UUID) -> str:
-        return str(gig_id)
-
-
+    #only present when the request asks for ?expand=client
+    client: Optional[ResponseEmployerSchema] = None
 
+class nearbyGigSchema(responseGigSchema):
+    #great circle distance from the search point
+    distance_km: float = None
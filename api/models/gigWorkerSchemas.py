@@ -1,10 +1,10 @@
-from pydantic import BaseModel, field_serializer
 from uuid import UUID
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from .jobCategoriesSchema import CategoryType
+from .baseDBmodels import BaseDBModel
 
-class BaseGigWorkerSchema(BaseModel):
+class BaseGigWorkerSchema(BaseDBModel):
     worker_id: Optional[UUID] = None
     created_at: Optional[datetime] = None
     user_id: UUID = None
@@ -23,7 +23,6 @@ class BaseGigWorkerSchema(BaseModel):
     pay_rate_hourly: Optional[int] = None
     link_to_resume: Optional[str] = ""
 
-
 class CreateGigWorkerSchema(BaseGigWorkerSchema):
     #worker_id is auto generated
     created_at: datetime = None
@@ -42,32 +41,23 @@ class CreateGigWorkerSchema(BaseGigWorkerSchema):
     pay_rate_total: float = None
     pay_rate_hourly: float = None    
 
-    @field_serializer('created_at')
-    def serialize_worker_id(self, created_at: datetime) -> str:
-        return str(created_at)
-    
-    @field_serializer('user_id')
-    def serialize_user_id(self, user_id: UUID) -> str:
-        return str(user_id)
-    
-
-
-
-
 class UpdateGigWorkerSchema(BaseGigWorkerSchema):
     worker_id: UUID = None
 
-    @field_serializer('worker_id')
-    def serialize_worker_id(self, worker_id: UUID) -> str:
-        return str(worker_id)
-
-
-
-
 class ResponseGigWorkerSchema(BaseGigWorkerSchema):
     worker_id: UUID = None
 
-    
-class ResponseWorkerReviewSchema(BaseModel):
+class ResponseWorkerReviewSchema(BaseDBModel):
     gig_worker_review:str = ""
 
+class WorkerGigCountsSchema(BaseDBModel):
+    pending: int = 0
+    past: int = 0
+    present: int = 0
+
+#everything the worker home screen needs in one response
+class WorkerDashboardSchema(BaseDBModel):
+    gig_counts: WorkerGigCountsSchema = WorkerGigCountsSchema()
+    ratings_avg: float = 0.00
+    recent_reviews: List[ResponseWorkerReviewSchema] = []
+    top_field: Optional[Dict] = None
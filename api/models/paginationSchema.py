@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+from typing import Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    items: List[T] = []
+    #opaque, pass it back as ?cursor= to get the next page. null on the last page
+    next_cursor: Optional[str] = None
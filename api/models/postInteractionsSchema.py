@@ -1,10 +1,12 @@
-from pydantic import BaseModel, field_serializer, field_validator, model_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 from uuid import UUID
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 from enum import Enum
+from .baseDBmodels import BaseDBModel
+from .batchSchema import MAX_BATCH_IDS
 
-class BasePostInteractionSchema(BaseModel):
+class BasePostInteractionSchema(BaseDBModel):
     id: Optional[UUID] = None
     created_at: datetime = None
     post_id: UUID = None
@@ -12,23 +14,6 @@ class BasePostInteractionSchema(BaseModel):
     interaction_type: str = None
     interaction_details: dict = {}
 
-    @field_serializer('id')
-    def serialize_id(self, id: UUID) -> str:
-        return str(id)
-    
-    @field_serializer('post_id')
-    def serialize_post_id(self, post_id: UUID) -> str:
-        return str(post_id)
-
-    @field_serializer('user_id')
-    def serialize_user_id(self, user_id: UUID) -> str:
-        return str(user_id)
-
-    @field_serializer('created_at')
-    def serialize_created_at(self, created_at: datetime) -> str:
-        return created_at.isoformat()
-    
-
 class CreatePostInteractionSchema(BasePostInteractionSchema):
     pass
 
@@ -46,3 +31,14 @@ class ResponsePostInteractionSchema(BasePostInteractionSchema):
         if v is None:
             raise ValueError('id is required')
         return v
+
+class PostInteractionCountsRequestSchema(BaseModel):
+    post_ids: List[UUID] = Field(min_length=1, max_length=MAX_BATCH_IDS)
+    #optional, fills viewer_interacted for this user
+    viewer_id: Optional[UUID] = None
+
+class PostInteractionCountsSchema(BaseDBModel):
+    #interaction_type -> how many there are on the post
+    counts: Dict[str, int] = {}
+    viewer_interacted: bool = False
+    viewer_interactions: List[str] = []
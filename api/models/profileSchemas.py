@@ -1,9 +1,9 @@
-from pydantic import BaseModel, field_serializer
 from uuid import UUID
 from datetime import datetime
 from typing import Optional
+from .baseDBmodels import BaseDBModel
 
-class BaseProfileSchema(BaseModel):
+class BaseProfileSchema(BaseDBModel):
     id: Optional[UUID] = None
     updated_at: Optional[datetime] = None
     username: Optional[str] = None
@@ -16,7 +16,6 @@ class BaseProfileSchema(BaseModel):
     phone_number: Optional[str] = None
     profile_email: Optional[str] = None
 
-
 class CreateProfileSchema(BaseProfileSchema):
     id: UUID
     updated_at: Optional[datetime] = None
@@ -30,14 +29,6 @@ class CreateProfileSchema(BaseProfileSchema):
     phone_number: Optional[str] = None
     profile_email: Optional[str] = None
 
-    @field_serializer('id')
-    def serialize_id(self, id: UUID) -> str:
-        return str(id)
-    
-    @field_serializer('updated_at')
-    def serialize_updated_at(self, dt: datetime) -> str:
-        return dt.isoformat()
-
 class UpdateProfileSchema(BaseProfileSchema):
     id: Optional[UUID] = None
     updated_at: datetime = None
@@ -51,10 +42,5 @@ class UpdateProfileSchema(BaseProfileSchema):
     phone_number: Optional[str] = None
     profile_email: Optional[str] = None
 
-    @field_serializer('updated_at')
-    def serialize_updated_at(self, dt: datetime) -> str:
-        return dt.isoformat()
- 
-
 class ResponseProfileSchema(BaseProfileSchema):
     pass
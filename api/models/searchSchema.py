@@ -0,0 +1,19 @@
+from uuid import UUID
+from datetime import datetime
+from typing import Optional
+from enum import Enum
+from .baseDBmodels import BaseDBModel
+
+class SearchKind(str, Enum):
+    gig = "gig"
+    post = "post"
+
+class SearchResultSchema(BaseDBModel):
+    kind: SearchKind = None
+    #gig_id for gigs, id for posts
+    id: UUID = None
+    title: Optional[str] = None
+    #matching fragment of the description / post content
+    snippet: Optional[str] = None
+    rank: float = 0
+    created_at: Optional[datetime] = None
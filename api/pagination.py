@@ -0,0 +1,110 @@
+import base64
+import json
+import logging
+from typing import Any, Callable, List, Optional
+import orjson
+from fastapi import HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+#rows fetched per round trip while streaming an export
+EXPORT_BATCH_SIZE = 500
+
+def encode_cursor(values: List[Any]) -> str:
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != 2:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+class PageParams:
+    """Query parameters shared by every keyset paginated list endpoint"""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    ):
+        self.limit = limit
+        #decoded here so a bad cursor is a 400 before the route's own error handling runs
+        self.after = decode_cursor(cursor) if cursor else None
+
+def quote_value(value: Any) -> str:
+    #postgrest needs values with reserved characters (timestamps have ':' and '+') double quoted
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+def keyset(query, page: PageParams, id_column: str, sort_column: str = "created_at", descending: bool = True):
+    """Order `query` by (sort_column, id_column) and seek past the page cursor.
+
+    Postgres puts nulls first when sorting descending and last when ascending,
+    so the seek predicate follows the same rule for rows with a null sort value.
+    """
+    op = "lt" if descending else "gt"
+    if page.after is not None:
+        sort_value, id_value = page.after
+        if sort_column == id_column:
+            query = query.filter(id_column, op, id_value)
+        elif sort_value is None:
+            same_null = f"and({sort_column}.is.null,{id_column}.{op}.{quote_value(id_value)})"
+            query = query.or_(f"{same_null},{sort_column}.not.is.null" if descending else same_null)
+        else:
+            seek = f"{sort_column}.{op}.{quote_value(sort_value)},and({sort_column}.eq.{quote_value(sort_value)},{id_column}.{op}.{quote_value(id_value)})"
+            query = query.or_(seek if descending else f"{seek},{sort_column}.is.null")
+    query = query.order(sort_column, desc=descending)
+    if sort_column != id_column:
+        query = query.order(id_column, desc=descending)
+    #one extra row tells us whether there is a next page without a count query
+    return query.limit(page.limit + 1)
+
+def to_page(rows: List[dict], page: PageParams, id_column: str, sort_column: str = "created_at") -> dict:
+    items = rows[:page.limit]
+    next_cursor = None
+    if len(rows) > page.limit:
+        last = items[-1]
+        next_cursor = encode_cursor([last.get(sort_column), last.get(id_column)])
+    return {"items": items, "next_cursor": next_cursor}
+
+async def fetch_page(query, page: PageParams, id_column: str, sort_column: str = "created_at", descending: bool = True) -> dict:
+    result = await keyset(query, page, id_column, sort_column, descending).execute()
+    return to_page(result.data, page, id_column, sort_column)
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+def stream_ndjson(make_query: Callable[[], Any], id_column: str, after: Optional[List[Any]] = None, sort_column: str = "created_at") -> StreamingResponse:
+    """Stream a whole table as one json object per line.
+
+    Pages through the table with the same keyset scheme as the list endpoints and
+    writes each batch out before fetching the next one, so memory stays flat no
+    matter how many rows there are. make_query must return a fresh builder on every
+    call because postgrest builders are mutated by filters.
+    """
+    async def rows():
+        page = PageParams(limit=EXPORT_BATCH_SIZE)
+        page.after = after
+        while True:
+            try:
+                result = await keyset(make_query(), page, id_column, sort_column).execute()
+            except Exception:
+                #headers are already sent, all we can do is cut the stream short
+                logger.exception("ndjson export stopped early")
+                raise
+            batch = result.data[:page.limit]
+            for row in batch:
+                yield orjson.dumps(row) + b"\n"
+            if len(result.data) <= page.limit:
+                break
+            page.after = [batch[-1].get(sort_column), batch[-1].get(id_column)]
+
+    return StreamingResponse(rows(), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,32 @@
+from typing import Dict, Iterable, Optional, Type
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+class Projection:
+    """Dependency that turns ?fields= and ?expand= into a postgrest select string.
+
+    fields picks columns of `schema`, expand embeds one of the known foreign keys
+    in `relations` (name -> postgrest embed) so the related row comes back in the
+    same round trip. Columns in `required` are always selected because pagination
+    cursors are built from them.
+    """
+
+    def __init__(self, schema: Type[BaseModel], relations: Optional[Dict[str, str]] = None, required: Iterable[str] = ()):
+        self.relations = relations or {}
+        self.columns = [name for name in schema.model_fields if name not in self.relations]
+        self.required = list(required)
+
+    def __call__(self, fields: Optional[str] = None, expand: Optional[str] = None) -> str:
+        selected = ["*"]
+        if fields:
+            requested = [f.strip() for f in fields.split(",") if f.strip()]
+            unknown = [f for f in requested if f not in self.columns]
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+            selected = list(dict.fromkeys(self.required + requested))
+        if expand:
+            for name in [e.strip() for e in expand.split(",") if e.strip()]:
+                if name not in self.relations:
+                    raise HTTPException(status_code=400, detail=f"Cannot expand {name}, expected one of: {', '.join(self.relations)}")
+                selected.append(self.relations[name])
+        return ",".join(selected)
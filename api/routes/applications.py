@@ -1,9 +1,13 @@
 from pydoc import Helper
 from typing import List
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 import logging
+from fastapi.responses import ORJSONResponse
 from ..config import supabase
+from ..pagination import PageParams, fetch_page, stream_ndjson, wants_ndjson
+from ..projection import Projection
 from ..models.applicationsSchema import CreateApplicationSchema, UpdateApplicationSchema, ResponseApplicationSchema
+from ..models.paginationSchema import Page
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -12,32 +16,37 @@ APPPLICATION_TABLE:str = 'applications'
 APPLICATION_ID:str = 'application_id'
 WORKER_ID:str = 'worker_id'
 GIG_TABLE:str = 'gig'
+WORKER_RATING_TABLE:str = 'worker_rating_stats'
 
-@router.get("/", response_model=list[ResponseApplicationSchema])
-async def get_applications()-> list[ResponseApplicationSchema]:
+PROJECTION = Projection(ResponseApplicationSchema, relations={'gig': 'gig:gig_id(*)', 'worker': 'worker:worker_id(*)'}, required=[APPLICATION_ID, 'created_at'])
+
+@router.get("/", response_model=Page[ResponseApplicationSchema])
+async def get_applications(request: Request, page: PageParams = Depends(), select: str = Depends(PROJECTION))-> Page[ResponseApplicationSchema]:
     try:
-        result = supabase.table(APPPLICATION_TABLE).select('*').execute()
-        return result.data
+        #Accept: application/x-ndjson exports every row instead of one page
+        if wants_ndjson(request):
+            return stream_ndjson(lambda: supabase.table(APPPLICATION_TABLE).select(select), APPLICATION_ID, after=page.after)
+        query = supabase.table(APPPLICATION_TABLE).select(select)
+        return ORJSONResponse(await fetch_page(query, page, APPLICATION_ID))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
 @router.get("/{applications_id}", response_model=ResponseApplicationSchema)
-async def get_application(applications_id: str) -> ResponseApplicationSchema:
+async def get_application(applications_id: str, select: str = Depends(PROJECTION)) -> ResponseApplicationSchema:
     try:
-        result = supabase.table(APPPLICATION_TABLE).select('*').eq(APPLICATION_ID, applications_id).execute()
-        return result.data[0]
+        result = await supabase.table(APPPLICATION_TABLE).select(select).eq(APPLICATION_ID, applications_id).execute()
+        return ORJSONResponse(result.data[0])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 #to get the gig worker gig reviews 
 @router.get("/worker/{worker_id}", response_model=float)
 async def get_worker_gigs(worker_id: str) -> float:
     try:
-        print(worker_id)
-        result = supabase.table(APPPLICATION_TABLE).select('gig_id').eq(WORKER_ID, worker_id).execute()
-        result_gig_ids = [i['gig_id'] for i in result.data]
-        gig_review_result = supabase.table(GIG_TABLE).select('review').in_('gig_id',result_gig_ids).execute().data
-        average_rating = sum([float(i['review']) for i in gig_review_result]) / len(gig_review_result)
-        return average_rating
+        #same aggregate as /gig-workers/ratings_avg, maintained by the record_worker_rating rpc
+        result = await supabase.table(WORKER_RATING_TABLE).select('rating_avg').eq(WORKER_ID, worker_id).execute()
+        if len(result.data) == 0:
+            return 0.00
+        return result.data[0]['rating_avg']
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
@@ -45,7 +54,7 @@ async def get_worker_gigs(worker_id: str) -> float:
 async def create_application(application: CreateApplicationSchema) -> ResponseApplicationSchema:
     try:
         logger.info(application.model_dump())
-        result =  supabase.table(APPPLICATION_TABLE).insert(application.model_dump(exclude_unset=True)).execute()
+        result =  await supabase.table(APPPLICATION_TABLE).insert(application.model_dump(exclude_unset=True)).execute()
         logger.info(result)
         return result.data[0]
     except Exception as e:
@@ -54,7 +63,7 @@ async def create_application(application: CreateApplicationSchema) -> ResponseAp
 @router.put("/{applications_id}", response_model=ResponseApplicationSchema)
 async def update_application(applications_id: str, application:  UpdateApplicationSchema) -> ResponseApplicationSchema:
     try:
-        result = supabase.table(APPPLICATION_TABLE).update(application.model_dump(exclude_unset=True)).eq(APPLICATION_ID, applications_id).execute()
+        result = await supabase.table(APPPLICATION_TABLE).update(application.model_dump(exclude_unset=True)).eq(APPLICATION_ID, applications_id).execute()
         return result.data[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -63,7 +72,7 @@ async def update_application(applications_id: str, application:  UpdateApplicati
 @router.delete("/{applications_id}")
 async def delete_application(applications_id: str):
     try:
-        result = supabase.table(APPPLICATION_TABLE).delete().eq(APPLICATION_ID, applications_id).execute()
+        result = await supabase.table(APPPLICATION_TABLE).delete().eq(APPLICATION_ID, applications_id).execute()
         return {"message": "Application deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
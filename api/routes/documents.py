@@ -3,9 +3,13 @@ import re
 import logging
 from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi.responses import ORJSONResponse
 from ..config import supabase
+from ..pagination import PageParams, fetch_page
+from ..projection import Projection
 from ..models.documentSchema import CreateDocumentSchema, UpdateDocumentSchema, ReturnDocumentSchema
+from ..models.paginationSchema import Page
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,19 +24,21 @@ def sanitize_filename(filename: str) -> str:
     filename = re.sub(r'[^a-zA-Z0-9_.-]', '', filename)
     return filename
 
+PROJECTION = Projection(ReturnDocumentSchema, relations={'application': 'application:application_id(*)'}, required=[GIG_ID, 'created_at'])
+
 @router.post("/upload-document")
 async def upload_document(file: UploadFile = File(...)):
     try:
         # Upload the file to the Supabase bucket
         file_content = await file.read()
         file_name = f"{sanitize_filename(file.filename)}"
-        result =  supabase.storage.from_("documents").upload(file_name, file_content)
+        result =  await supabase.storage.from_("documents").upload(file_name, file_content)
         print(result)
         # if result.error:
         #     raise HTTPException(status_code=500, detail=result.error.message)
         
         # Get the public URL of the uploaded file
-        document_url = supabase.storage.from_("documents").get_public_url(file_name)
+        document_url = await supabase.storage.from_("documents").get_public_url(file_name)
         print(document_url)
         return {"document_url": document_url}
     except Exception as e:
@@ -42,25 +48,24 @@ async def upload_document(file: UploadFile = File(...)):
 async def download_document(file_name: str):
     try:
         # Get the public URL of the uploaded file
-        document_url = supabase.storage.from_("documents").get_public_url(file_name)
+        document_url = await supabase.storage.from_("documents").get_public_url(file_name)
         return {"document_url": document_url}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/", response_model=list[ReturnDocumentSchema])
-async def get_documents()-> list[ReturnDocumentSchema]:
+@router.get("/", response_model=Page[ReturnDocumentSchema])
+async def get_documents(page: PageParams = Depends(), select: str = Depends(PROJECTION))-> Page[ReturnDocumentSchema]:
     try:
-        result = supabase.table(GIG_TABLE).select('*').execute()
-        print(type(result))
-        return result.data
+        query = supabase.table(GIG_TABLE).select(select)
+        return ORJSONResponse(await fetch_page(query, page, GIG_ID))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
 @router.get("/{document_id}", response_model=ReturnDocumentSchema)
-async def get_document(document_id: str) -> ReturnDocumentSchema:
+async def get_document(document_id: str, select: str = Depends(PROJECTION)) -> ReturnDocumentSchema:
     try:
-        result = supabase.table(GIG_TABLE).select('*').eq(GIG_ID, document_id).execute()
-        return result.data[0]
+        result = await supabase.table(GIG_TABLE).select(select).eq(GIG_ID, document_id).execute()
+        return ORJSONResponse(result.data[0])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
@@ -68,7 +73,7 @@ async def get_document(document_id: str) -> ReturnDocumentSchema:
 async def create_document(document: CreateDocumentSchema) -> ReturnDocumentSchema:
     try:
         logger.info(document.model_dump())
-        result =  supabase.table(GIG_TABLE).insert(document.model_dump(exclude_unset=True)).execute()
+        result =  await supabase.table(GIG_TABLE).insert(document.model_dump(exclude_unset=True)).execute()
         logger.info(result)
         return result.data[0]
     except Exception as e:
@@ -78,7 +83,7 @@ async def create_document(document: CreateDocumentSchema) -> ReturnDocumentSchem
 async def update_document(document_id: str, document: UpdateDocumentSchema) -> ReturnDocumentSchema:
     try:
         print(document.model_dump(exclude_unset=True,serialize_as_any=True))
-        result = supabase.table(GIG_TABLE).update(document.model_dump(exclude_unset=True)).eq(GIG_ID, document_id).execute()
+        result = await supabase.table(GIG_TABLE).update(document.model_dump(exclude_unset=True)).eq(GIG_ID, document_id).execute()
         return result.data[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -86,7 +91,7 @@ async def update_document(document_id: str, document: UpdateDocumentSchema) -> R
 @router.delete("/{document_id}")
 async def delete_document(document_id: str):
     try:
-        result = supabase.table(GIG_TABLE).delete().eq(GIG_ID, document_id).execute()
+        result = await supabase.table(GIG_TABLE).delete().eq(GIG_ID, document_id).execute()
         return {"message": "Document deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
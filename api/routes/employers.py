@@ -1,8 +1,16 @@
 from pydoc import Helper
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 import logging
+from typing import Dict
+from fastapi.responses import ORJSONResponse
 from ..config import supabase
+from ..etag import etag_for, etag_response
+from ..cache import entity_cache
+from ..pagination import PageParams, fetch_page
+from ..projection import Projection
 from ..models.employersSchemas import CreateEmployerSchema, UpdateEmployerSchema, ResponseEmployerSchema
+from ..models.paginationSchema import Page
+from ..models.batchSchema import BatchIdsSchema
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -12,19 +20,30 @@ CLIENT_ID:str = 'client_id'
 GIG_TABLE:str = 'gig'
 GIG_ID:str = 'gig_id'
 
-@router.get("/", response_model=list[ResponseEmployerSchema])
-async def get_employers()-> list[ResponseEmployerSchema]:
+PROJECTION = Projection(ResponseEmployerSchema, required=[CLIENT_ID, 'created_at'])
+
+@router.get("/", response_model=Page[ResponseEmployerSchema])
+async def get_employers(page: PageParams = Depends(), select: str = Depends(PROJECTION))-> Page[ResponseEmployerSchema]:
     try:
-        result = supabase.table(CLIENT_TABLE).select('*').execute()
-        return result.data
+        query = supabase.table(CLIENT_TABLE).select(select)
+        return ORJSONResponse(await fetch_page(query, page, CLIENT_ID))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
 @router.get("/{client_id}", response_model=ResponseEmployerSchema)
-async def get_employer(client_id: str) -> ResponseEmployerSchema:
+async def get_employer(request: Request, client_id: str, select: str = Depends(PROJECTION)) -> ResponseEmployerSchema:
     try:
-        result = supabase.table(CLIENT_TABLE).select('*').eq(CLIENT_ID, client_id).execute()
-        return result.data[0]
+        #the etag is cached next to the row so a revalidation is answered without touching supabase
+        async def load():
+            result = await supabase.table(CLIENT_TABLE).select(select).eq(CLIENT_ID, client_id).execute()
+            row = result.data[0]
+            return row, etag_for(CLIENT_TABLE, client_id, row, whole_row=select == '*')
+        #only whole rows are cached, sparse or expanded reads go straight to supabase
+        if select != '*':
+            row, etag = await load()
+        else:
+            row, etag = await entity_cache.get_or_load(CLIENT_TABLE, client_id, load)
+        return etag_response(request, row, etag)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -32,7 +51,7 @@ async def get_employer(client_id: str) -> ResponseEmployerSchema:
 async def create_employer(employer: CreateEmployerSchema) -> ResponseEmployerSchema:
     try:
         logger.info(employer.model_dump())
-        result =  supabase.table(CLIENT_TABLE).insert(employer.model_dump(exclude_unset=True)).execute()
+        result =  await supabase.table(CLIENT_TABLE).insert(employer.model_dump(exclude_unset=True)).execute()
         logger.info(result)
         return result.data[0]
     except Exception as e:
@@ -41,63 +60,51 @@ async def create_employer(employer: CreateEmployerSchema) -> ResponseEmployerSch
 @router.put("/{client_id}", response_model=ResponseEmployerSchema)
 async def update_employer(client_id: str, employer: UpdateEmployerSchema) -> ResponseEmployerSchema:
     try:
-        new_count,new_rating=update_company_rating(client_id,employer)
-        employer.company_rating=new_rating
-        employer.individual_ratings=new_count
-
-        result = supabase.table(CLIENT_TABLE).update(employer.model_dump(exclude_unset=True)).eq(CLIENT_ID, client_id).execute()
-        return result.data[0]
+        #the rating aggregate is never written directly, a submitted company_rating is one new rating
+        #that the add_company_rating rpc folds into the average atomically
+        result = None
+        if employer.company_rating is not None:
+            result = await supabase.rpc('add_company_rating', {'p_client_id': client_id, 'p_rating': employer.company_rating}).execute()
+        fields = employer.model_dump(exclude_unset=True, exclude={'company_rating', 'individual_ratings'})
+        if fields or result is None:
+            result = await supabase.table(CLIENT_TABLE).update(fields).eq(CLIENT_ID, client_id).execute()
+            row = result.data[0]
+        else:
+            row = result.data
+        entity_cache.invalidate(CLIENT_TABLE, client_id)
+        return row
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-#no longer need this look at the new gig routes to rate the gig worker
-#helper method to average company ratings
-def update_company_rating(client_id: str, employer: UpdateEmployerSchema):
-    
-    updated_rating_count = supabase.table(CLIENT_TABLE) \
-    .select('*') \
-    .eq('client_id', client_id) \
-    .execute()
-        #then calcuating new rating average
-    print(updated_rating_count)
-    print(updated_rating_count.data[0]['individual_ratings'])
-    if updated_rating_count.data[0]['individual_ratings']==None:
-        current_count=1
-        print('in first if')
-    else:
-        current_count= updated_rating_count.data[0]['individual_ratings']
-    if updated_rating_count.data[0]['company_rating']==None:
-        current_average=0
-    else:
-        current_average=updated_rating_count.data[0]['company_rating']
-
-        # Formula: new_avg = (old_avg * old_count + new_rating) / (old_count + 1)
-    new_count = current_count + 1
-    new_average = ((current_average * current_count) + employer.company_rating) / new_count
-
-        # Update both the count and average
-    return new_count,new_average
-
 #what the gig_worker rates the employer on a particular gig
 @router.get("/ratings_avg/{company_id}")
 async def get_company_rating_avg(company_id: str) -> float:
     try:
-        result = supabase.table(GIG_TABLE).select('gig_id').eq(CLIENT_ID, company_id).execute()
-        result_gig_ids = [i['gig_id'] for i in result.data]
-        company_review_result = supabase.table(GIG_TABLE).select('company_rating').in_('gig_id',result_gig_ids).execute().data
-        print(company_review_result)
-        print(len(company_review_result))
-        average_rating = sum([i['company_rating'] for i in company_review_result]) / len(company_review_result)
-        return average_rating
+        #maintained by the add_company_rating and record_company_rating rpcs
+        result = await supabase.table(CLIENT_TABLE).select('company_rating').eq(CLIENT_ID, company_id).execute()
+        if len(result.data) == 0 or result.data[0]['company_rating'] is None:
+            return 0.00
+        return result.data[0]['company_rating']
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+#rating badges for a whole listing screen, one query for every id. unrated companies come back as 0
+@router.post("/ratings_avg", response_model=Dict[str, float])
+async def get_company_rating_avg_batch(batch: BatchIdsSchema) -> Dict[str, float]:
+    try:
+        client_ids = [str(i) for i in batch.ids]
+        result = await supabase.table(CLIENT_TABLE).select(f'{CLIENT_ID},company_rating').in_(CLIENT_ID, client_ids).execute()
+        ratings = {row[CLIENT_ID]: row['company_rating'] for row in result.data if row['company_rating'] is not None}
+        return ORJSONResponse({i: ratings.get(i, 0.00) for i in client_ids})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 #get a list of reviews that gig workers have given the company
 @router.get("/reviews/{company_id}")
 async def get_company_reviews(company_id:str):
     try:
-        result = supabase.table(GIG_TABLE).select('gig_id').eq(CLIENT_ID, company_id).execute()
+        result = await supabase.table(GIG_TABLE).select('gig_id').eq(CLIENT_ID, company_id).execute()
         result_gig_ids = [i['gig_id'] for i in result.data]
-        company_review_result = supabase.table(GIG_TABLE).select('company_review').in_('gig_id',result_gig_ids).execute().data
+        company_review_result = (await supabase.table(GIG_TABLE).select('company_review').in_('gig_id',result_gig_ids).execute()).data
         return company_review_result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -106,7 +113,8 @@ async def get_company_reviews(company_id:str):
 @router.post("/gig/{gig_id}/leave_worker_review")
 async def leave_worker_review(gig_id:str,review:str):
     try:
-        result = supabase.table(GIG_TABLE).update({'gig_worker_review':review}).eq(GIG_ID, gig_id).execute()
+        result = await supabase.table(GIG_TABLE).update({'gig_worker_review':review}).eq(GIG_ID, gig_id).execute()
+        entity_cache.invalidate(GIG_TABLE, gig_id)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -114,7 +122,9 @@ async def leave_worker_review(gig_id:str,review:str):
 @router.post("/gig/{gig_id}/leave_worker_rating")
 async def leave_worker_rating(gig_id:str,review:str):
     try:
-        result = supabase.table(GIG_TABLE).update({'gig_worker_rating':review}).eq(GIG_ID, gig_id).execute()
+        #sets gig.gig_worker_rating and updates the worker's running average in the same transaction
+        result = await supabase.rpc('record_worker_rating', {'p_gig_id': gig_id, 'p_rating': float(review)}).execute()
+        entity_cache.invalidate(GIG_TABLE, gig_id)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -3,10 +3,14 @@ import re
 import logging
 from typing import Any, Dict, Optional
 from uuid import UUID
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile
 import httpx
+from fastapi.responses import ORJSONResponse
 from ..config import supabase
+from ..pagination import PageParams, fetch_page, stream_ndjson, wants_ndjson
+from ..projection import Projection
 from ..models.financial_schema import CreateFinancialSchema, UpdateFinancialSchema, ReturnFinancialSchema  
+from ..models.paginationSchema import Page
 from google import genai
 
 logging.basicConfig(level=logging.INFO)
@@ -15,19 +19,24 @@ router = APIRouter(prefix="/financials", tags=["financials"])
 FINANCIAL_TABLE:str = 'financial_account'
 FINANCIAL_ID:str = 'account_id'
 
-@router.get("/", response_model=list[ReturnFinancialSchema])
-async def get_financials()-> list[ReturnFinancialSchema]:
+PROJECTION = Projection(ReturnFinancialSchema, required=[FINANCIAL_ID, 'created_at'])
+
+@router.get("/", response_model=Page[ReturnFinancialSchema])
+async def get_financials(request: Request, page: PageParams = Depends(), select: str = Depends(PROJECTION))-> Page[ReturnFinancialSchema]:
     try:
-        result = supabase.table(FINANCIAL_TABLE).select('*').execute()
-        return result.data
+        #Accept: application/x-ndjson exports every row instead of one page
+        if wants_ndjson(request):
+            return stream_ndjson(lambda: supabase.table(FINANCIAL_TABLE).select(select), FINANCIAL_ID, after=page.after)
+        query = supabase.table(FINANCIAL_TABLE).select(select)
+        return ORJSONResponse(await fetch_page(query, page, FINANCIAL_ID))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
 @router.get("/{financial_id}", response_model=ReturnFinancialSchema)
-async def get_financial(financial_id: str) -> ReturnFinancialSchema:
+async def get_financial(financial_id: str, select: str = Depends(PROJECTION)) -> ReturnFinancialSchema:
     try:
-        result = supabase.table(FINANCIAL_TABLE).select('*').eq(FINANCIAL_ID, financial_id).execute()
-        return result.data[0]
+        result = await supabase.table(FINANCIAL_TABLE).select(select).eq(FINANCIAL_ID, financial_id).execute()
+        return ORJSONResponse(result.data[0])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
@@ -35,7 +44,7 @@ async def get_financial(financial_id: str) -> ReturnFinancialSchema:
 async def create_financial(financial: CreateFinancialSchema) -> ReturnFinancialSchema:
     try:
         logger.info(financial.model_dump())
-        result =  supabase.table(FINANCIAL_TABLE).insert(financial.model_dump(exclude_unset=True)).execute()
+        result =  await supabase.table(FINANCIAL_TABLE).insert(financial.model_dump(exclude_unset=True)).execute()
         logger.info(result)
         return result.data[0]
     except Exception as e:
@@ -44,7 +53,7 @@ async def create_financial(financial: CreateFinancialSchema) -> ReturnFinancialS
 @router.put("/{financial_id}", response_model=ReturnFinancialSchema)
 async def update_financial(financial_id: str, financial: UpdateFinancialSchema) -> ReturnFinancialSchema:
     try:
-        result = supabase.table(FINANCIAL_TABLE).update(financial.model_dump(exclude_unset=True)).eq(FINANCIAL_ID, financial_id).execute()
+        result = await supabase.table(FINANCIAL_TABLE).update(financial.model_dump(exclude_unset=True)).eq(FINANCIAL_ID, financial_id).execute()
         return result.data[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -52,7 +61,7 @@ async def update_financial(financial_id: str, financial: UpdateFinancialSchema)
 @router.delete("/{financial_id}")
 async def delete_financial(financial_id: str):
     try:
-        result = supabase.table(FINANCIAL_TABLE).delete().eq(FINANCIAL_ID, financial_id).execute()
+        result = await supabase.table(FINANCIAL_TABLE).delete().eq(FINANCIAL_ID, financial_id).execute()
         return {"message": "Financial deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -68,7 +77,7 @@ async def get_finance_suggestions(financial: CreateFinancialSchema) -> Dict[str,
         input_text = f"Provide financial suggestions based on the following data: {financial.model_dump(exclude_unset=True)}"
         
         # Call the Google Gemini API
-        response = client.models.generate_content(
+        response = await client.aio.models.generate_content(
             model="gemini-2.0-flash",
             contents=input_text
         )
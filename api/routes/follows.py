@@ -1,11 +1,17 @@
 from datetime import datetime
 import re
 import logging
-from typing import Optional
+import asyncio
+from typing import Dict, Optional
 from uuid import UUID
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi.responses import ORJSONResponse
 from ..config import supabase
-from ..models.followsSchema import CreateFollowSchema, UpdateFollowSchema, ReturnFollowSchema, FollowedCountSchema, FollowerCountSchema
+from ..follow_graph import follow_graph
+from ..pagination import PageParams, fetch_page
+from ..models.batchSchema import BatchIdsSchema
+from ..models.paginationSchema import Page
+from ..models.followsSchema import CreateFollowSchema, UpdateFollowSchema, ReturnFollowSchema, FollowedCountSchema, FollowerCountSchema, RelationshipSchema, ReturnFollowWithProfileSchema, FollowSuggestionSchema
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -14,39 +20,38 @@ FOLLOWS_TABLE:str = 'follows'
 FOLLOWER_ID:str = 'follower_id'
 FOLLOWED_ID:str = 'followed_id'
 PROFILE_ID:str = 'id'
+FOLLOW_COUNTS_TABLE:str = 'follow_counts'
+PROFILE_SUMMARY:str = 'username,full_name,avatar_url'
 
-@router.get("/{Profile_Id}/followed", response_model=list[ReturnFollowSchema])
-async def get_followers(Profile_Id)-> list[ReturnFollowSchema]:
+#the follower's profile summary is embedded through the follower_id foreign key, so rendering a page
+#is one query. pages are keyed on follower_id, which the (followed_id, follower_id) index serves in order
+@router.get("/{Profile_Id}/followed", response_model=Page[ReturnFollowWithProfileSchema])
+async def get_followers(Profile_Id, page: PageParams = Depends())-> Page[ReturnFollowWithProfileSchema]:
     try:
-        result = supabase.table(FOLLOWS_TABLE).select('*').eq(FOLLOWED_ID,Profile_Id).execute()
-        print(type(result))
-        return result.data
+        query = supabase.table(FOLLOWS_TABLE).select(f'{FOLLOWED_ID},{FOLLOWER_ID},profile:profiles!{FOLLOWER_ID}({PROFILE_SUMMARY})').eq(FOLLOWED_ID,Profile_Id)
+        return ORJSONResponse(await fetch_page(query, page, FOLLOWER_ID, sort_column=FOLLOWER_ID, descending=False))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{Profile_Id}/followed/count", response_model=FollowedCountSchema)
 async def get_countOf_followers(Profile_Id)-> FollowedCountSchema:
     try:
-        result = supabase.table(FOLLOWS_TABLE).select('*', count="exact").eq(FOLLOWED_ID,Profile_Id).execute()
-        return {"followed_id": Profile_Id,"followed_count": result.count}
+        return {"followed_id": Profile_Id,"followed_count": await follow_count(Profile_Id, 'followers_count', FOLLOWED_ID)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
-@router.get("/{Profile_Id}/following", response_model=list[ReturnFollowSchema])
-async def get_following(Profile_Id)-> list[ReturnFollowSchema]:
+@router.get("/{Profile_Id}/following", response_model=Page[ReturnFollowWithProfileSchema])
+async def get_following(Profile_Id, page: PageParams = Depends())-> Page[ReturnFollowWithProfileSchema]:
     try:
-        result = supabase.table(FOLLOWS_TABLE).select('*').eq(FOLLOWER_ID,Profile_Id).execute()
-        print(type(result))
-        return result.data
+        query = supabase.table(FOLLOWS_TABLE).select(f'{FOLLOWED_ID},{FOLLOWER_ID},profile:profiles!{FOLLOWED_ID}({PROFILE_SUMMARY})').eq(FOLLOWER_ID,Profile_Id)
+        return ORJSONResponse(await fetch_page(query, page, FOLLOWED_ID, sort_column=FOLLOWED_ID, descending=False))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
 @router.get("/{Profile_Id}/followers/count", response_model=FollowerCountSchema)
 async def get_countOf_following(Profile_Id)-> FollowerCountSchema:
     try:
-        result = supabase.table(FOLLOWS_TABLE).select('*', count="exact").eq(FOLLOWER_ID,Profile_Id).execute()
-        print(type(result))
-        return {"follower_id": Profile_Id,"follower_count": result.count}
+        return {"follower_id": Profile_Id,"follower_count": await follow_count(Profile_Id, 'following_count', FOLLOWER_ID)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
@@ -54,8 +59,9 @@ async def get_countOf_following(Profile_Id)-> FollowerCountSchema:
 async def create_follow(follow: CreateFollowSchema) -> ReturnFollowSchema:
     try:
         logger.info(follow.model_dump())
-        result =  supabase.table(FOLLOWS_TABLE).insert(follow.model_dump(exclude_unset=True)).execute()
+        result =  await supabase.table(FOLLOWS_TABLE).insert(follow.model_dump(exclude_unset=True)).execute()
         logger.info(result)
+        follow_graph.add(str(follow.follower_id), str(follow.followed_id))
         return result.data[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -63,7 +69,8 @@ async def create_follow(follow: CreateFollowSchema) -> ReturnFollowSchema:
 @router.delete("/{Profile_Id}/unfollow/{Profile_Id2}")
 async def delete_follow(Profile_Id: str, Profile_Id2: str):
     try:
-        result = supabase.table(FOLLOWS_TABLE).delete().eq(FOLLOWER_ID, Profile_Id).eq(FOLLOWED_ID, Profile_Id2).execute()
+        result = await supabase.table(FOLLOWS_TABLE).delete().eq(FOLLOWER_ID, Profile_Id).eq(FOLLOWED_ID, Profile_Id2).execute()
+        follow_graph.remove(Profile_Id, Profile_Id2)
         return {"message": "Follow deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -71,7 +78,7 @@ async def delete_follow(Profile_Id: str, Profile_Id2: str):
 @router.get("/{Profile_Id}/isFollowing/{Profile_Id2}", response_model=bool)
 async def isFollowing(Profile_Id: str, Profile_Id2: str):
     try:
-        result = supabase.table(FOLLOWS_TABLE).select('*').eq(FOLLOWER_ID, Profile_Id).eq(FOLLOWED_ID, Profile_Id2).execute()
+        result = await supabase.table(FOLLOWS_TABLE).select('*').eq(FOLLOWER_ID, Profile_Id).eq(FOLLOWED_ID, Profile_Id2).execute()
         return len(result.data) > 0
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -79,9 +86,49 @@ async def isFollowing(Profile_Id: str, Profile_Id2: str):
 @router.get("/{Profile_Id}/isFollowed/{Profile_Id2}", response_model=bool)
 async def isFollowed(Profile_Id: str, Profile_Id2: str):
     try:
-        result = supabase.table(FOLLOWS_TABLE).select('*').eq(FOLLOWER_ID, Profile_Id2).eq(FOLLOWED_ID, Profile_Id).execute()
+        result = await supabase.table(FOLLOWS_TABLE).select('*').eq(FOLLOWER_ID, Profile_Id2).eq(FOLLOWED_ID, Profile_Id).execute()
         return len(result.data) > 0
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    
 
+#people you may know, ranked by friends of friends and a shared job specialty from the in-memory graph
+@router.get("/{Profile_Id}/suggestions", response_model=list[FollowSuggestionSchema])
+async def get_follow_suggestions(Profile_Id: str, limit: int = Query(10, ge=1, le=50)) -> list[FollowSuggestionSchema]:
+    if not follow_graph.ready:
+        raise HTTPException(status_code=503, detail="Suggestions are still loading", headers={"Retry-After": "5"})
+    try:
+        return ORJSONResponse(follow_graph.suggest(Profile_Id, limit))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+#following / followed_by flags between the viewer and every id in the batch, for rendering a feed
+#answered from the in-memory follow graph, which holds every edge and is kept current by these routes
+#and the change feed, so a feed render costs no round trip. while the graph is loading both directions
+#are indexed in_() queries over just the batch, bounded by MAX_BATCH_IDS so postgrest's max-rows can't cut them short
+@router.post("/{Profile_Id}/relationships", response_model=Dict[str, RelationshipSchema])
+async def get_relationships(Profile_Id: str, batch: BatchIdsSchema) -> Dict[str, RelationshipSchema]:
+    try:
+        profile_ids = [str(i) for i in batch.ids]
+        if follow_graph.ready:
+            return ORJSONResponse({
+                i: {"following": follow_graph.is_following(Profile_Id, i), "followed_by": follow_graph.is_following(i, Profile_Id)}
+                for i in profile_ids
+            })
+        followees, followers = await asyncio.gather(
+            supabase.table(FOLLOWS_TABLE).select(FOLLOWED_ID).eq(FOLLOWER_ID, Profile_Id).in_(FOLLOWED_ID, profile_ids).execute(),
+            supabase.table(FOLLOWS_TABLE).select(FOLLOWER_ID).eq(FOLLOWED_ID, Profile_Id).in_(FOLLOWER_ID, profile_ids).execute(),
+        )
+        following = {row[FOLLOWED_ID] for row in followees.data}
+        followed_by = {row[FOLLOWER_ID] for row in followers.data}
+        return ORJSONResponse({i: {"following": i in following, "followed_by": i in followed_by} for i in profile_ids})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+#the follow_counts row is kept current by a trigger on follows, so creating or deleting a follow
+#updates it in the same transaction. a profile without a row falls back to a head count
+async def follow_count(profile_id: str, counter: str, column: str) -> int:
+    result = await supabase.table(FOLLOW_COUNTS_TABLE).select(counter).eq('profile_id', profile_id).execute()
+    if result.data:
+        return result.data[0][counter]
+    result = await supabase.table(FOLLOWS_TABLE).select(column, count="exact", head=True).eq(column, profile_id).execute()
+    return result.count or 0
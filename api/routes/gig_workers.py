@@ -1,12 +1,18 @@
 from datetime import datetime
+import asyncio
 import re
 import logging
-from typing import List, Optional
+from typing import Dict, List, Optional
 from uuid import UUID
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi.responses import ORJSONResponse
 from ..config import supabase
-from ..models.gigWorkerSchemas import CreateGigWorkerSchema, UpdateGigWorkerSchema, ResponseGigWorkerSchema, ResponseWorkerReviewSchema
-from collections import Counter
+from ..cache import entity_cache
+from ..pagination import PageParams, fetch_page
+from ..projection import Projection
+from ..models.gigWorkerSchemas import CreateGigWorkerSchema, UpdateGigWorkerSchema, ResponseGigWorkerSchema, ResponseWorkerReviewSchema, WorkerDashboardSchema
+from ..models.paginationSchema import Page
+from ..models.batchSchema import BatchIdsSchema
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,21 +24,30 @@ APPLICATION_ID:str = 'application_id'
 GIG_TABLE:str = 'gig'
 GIG_ID:str = 'gig_id'
 USER_ID:str = 'user_id'
+WORKER_RATING_TABLE:str = 'worker_rating_stats'
+CLIENT_TABLE:str = 'client'
+RECENT_REVIEWS_LIMIT:int = 5
 
-@router.get("/", response_model=list[ResponseGigWorkerSchema])
-async def get_gig_workers()-> list[ResponseGigWorkerSchema]:
+PROJECTION = Projection(ResponseGigWorkerSchema, required=[GIGWORKER_ID, 'created_at'])
+
+@router.get("/", response_model=Page[ResponseGigWorkerSchema])
+async def get_gig_workers(page: PageParams = Depends(), select: str = Depends(PROJECTION))-> Page[ResponseGigWorkerSchema]:
     try:
-        result = supabase.table(GIGWORKER_TABLE).select('*').execute()
-        print(type(result))
-        return result.data
+        query = supabase.table(GIGWORKER_TABLE).select(select)
+        return ORJSONResponse(await fetch_page(query, page, GIGWORKER_ID))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
        
 @router.get("/{worker_id}", response_model=ResponseGigWorkerSchema)
-async def get_gig_worker(worker_id: str) -> ResponseGigWorkerSchema:
+async def get_gig_worker(worker_id: str, select: str = Depends(PROJECTION)) -> ResponseGigWorkerSchema:
     try:
-        result = supabase.table(GIGWORKER_TABLE).select('*').eq(GIGWORKER_ID, worker_id).execute()
-        return result.data[0]
+        async def load():
+            result = await supabase.table(GIGWORKER_TABLE).select(select).eq(GIGWORKER_ID, worker_id).execute()
+            return result.data[0]
+        #only whole rows are cached, sparse or expanded reads go straight to supabase
+        if select != '*':
+            return ORJSONResponse(await load())
+        return ORJSONResponse(await entity_cache.get_or_load(GIGWORKER_TABLE, worker_id, load))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -40,7 +55,7 @@ async def get_gig_worker(worker_id: str) -> ResponseGigWorkerSchema:
 async def create_gig_worker(gig_worker: CreateGigWorkerSchema) -> ResponseGigWorkerSchema:
     try:
         logger.info(gig_worker.model_dump())
-        result =  supabase.table(GIGWORKER_TABLE).insert(gig_worker.model_dump(exclude_unset=True)).execute()
+        result =  await supabase.table(GIGWORKER_TABLE).insert(gig_worker.model_dump(exclude_unset=True)).execute()
         logger.info(result)
         return result.data[0]
     except Exception as e:
@@ -49,7 +64,8 @@ async def create_gig_worker(gig_worker: CreateGigWorkerSchema) -> ResponseGigWor
 @router.put("/{worker_id}", response_model=ResponseGigWorkerSchema)
 async def update_gig_worker(worker_id: str, gig_worker: UpdateGigWorkerSchema) -> ResponseGigWorkerSchema:
     try:
-        result = supabase.table(GIGWORKER_TABLE).update(gig_worker.model_dump(exclude_unset=True)).eq(GIGWORKER_ID, worker_id).execute()
+        result = await supabase.table(GIGWORKER_TABLE).update(gig_worker.model_dump(exclude_unset=True)).eq(GIGWORKER_ID, worker_id).execute()
+        entity_cache.invalidate(GIGWORKER_TABLE, worker_id)
         return result.data[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -58,7 +74,8 @@ async def update_gig_worker(worker_id: str, gig_worker: UpdateGigWorkerSchema) -
 @router.delete("/{worker_id}")
 async def delete_gig_worker(worker_id: str):
     try:
-        result = supabase.table(GIGWORKER_TABLE).delete().eq(GIGWORKER_ID, worker_id).execute()
+        result = await supabase.table(GIGWORKER_TABLE).delete().eq(GIGWORKER_ID, worker_id).execute()
+        entity_cache.invalidate(GIGWORKER_TABLE, worker_id)
         return {"message": "Gig Worker deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -67,12 +84,8 @@ async def delete_gig_worker(worker_id: str):
 @router.get("/reviews/{worker_id}", response_model=List[ResponseWorkerReviewSchema])
 async def get_gig_worker_reviews(worker_id:str) -> List[ResponseWorkerReviewSchema]:
     try:
-        result = supabase.table(APPLICATION_TABLE).select('gig_id').eq(GIGWORKER_ID, worker_id).execute()
-        print(result)
-        result_gig_ids = [i['gig_id'] for i in result.data]
-        print(result_gig_ids)
-        gig_review_result = supabase.table(GIG_TABLE).select('gig_worker_review').in_('gig_id',result_gig_ids).execute().data
-        print(gig_review_result)
+        gig_ids = await worker_gig_ids(worker_id)
+        gig_review_result = (await supabase.table(GIG_TABLE).select('gig_worker_review').in_('gig_id',gig_ids).execute()).data
         return gig_review_result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -82,16 +95,18 @@ async def get_gig_worker_reviews(worker_id:str) -> List[ResponseWorkerReviewSche
 @router.get("/ratings_avg/{worker_id}", response_model=float)
 async def get_gig_worker_ratings_avg(worker_id:str) -> float:
     try:
-        #get the gig ids that the worker has worked on and sum then then averaage then
-        result = supabase.table(APPLICATION_TABLE).select('gig_id').eq(GIGWORKER_ID, worker_id).execute()
-        print('relkslfeakl', result)
-        #just for testing if the gig worker has no ratings aka dummy account
-        if len(result.data) == 0:
-            return 0.00
-        result_gig_ids = [i['gig_id'] for i in result.data]
-        gig_review_result = supabase.table(GIG_TABLE).select('gig_worker_rating').in_('gig_id',result_gig_ids).execute().data
-        average_rating = sum([i['gig_worker_rating'] for i in gig_review_result]) / len(gig_review_result)
-        return average_rating
+        return await worker_ratings_avg(worker_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+#rating badges for a whole listing screen, one query for every id. unrated workers come back as 0
+@router.post("/ratings_avg", response_model=Dict[str, float])
+async def get_gig_worker_ratings_avg_batch(batch: BatchIdsSchema) -> Dict[str, float]:
+    try:
+        worker_ids = [str(i) for i in batch.ids]
+        result = await supabase.table(WORKER_RATING_TABLE).select(f'{GIGWORKER_ID},rating_avg').in_(GIGWORKER_ID, worker_ids).execute()
+        ratings = {row[GIGWORKER_ID]: row['rating_avg'] for row in result.data}
+        return ORJSONResponse({i: ratings.get(i, 0.00) for i in worker_ids})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -99,7 +114,8 @@ async def get_gig_worker_ratings_avg(worker_id:str) -> float:
 @router.post("/gig/{gig_id}/leave_employer_review")
 async def leave_worker_review(gig_id:str,review:str):
     try:
-        result = supabase.table(GIG_TABLE).update({'company_review':review}).eq(GIG_ID, gig_id).execute()
+        result = await supabase.table(GIG_TABLE).update({'company_review':review}).eq(GIG_ID, gig_id).execute()
+        entity_cache.invalidate(GIG_TABLE, gig_id)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -107,7 +123,11 @@ async def leave_worker_review(gig_id:str,review:str):
 @router.post("/gig/{gig_id}/leave_employer_rating")
 async def leave_worker_rating(gig_id:str,review:str):
     try:
-        result = supabase.table(GIG_TABLE).update({'company_rating':review}).eq(GIG_ID, gig_id).execute()
+        #sets gig.company_rating and updates the company's running average in the same transaction
+        result = await supabase.rpc('record_company_rating', {'p_gig_id': gig_id, 'p_rating': float(review)}).execute()
+        entity_cache.invalidate(GIG_TABLE, gig_id)
+        if result.data:
+            entity_cache.invalidate(CLIENT_TABLE, result.data['client_id'])
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -116,11 +136,10 @@ async def leave_worker_rating(gig_id:str,review:str):
 @router.get("/{worker_id}/TopFieldOfWork")
 async def get_top_field_of_work(worker_id:str):
     try:
-        result = supabase.table(GIGWORKER_TABLE).select('specialties').eq(USER_ID, worker_id).execute()
-        if len(result.data) == 0:
+        top_field = await worker_top_field(worker_id)
+        if top_field is None:
             return "No specialties found"
-        print(result)
-        return result.data[0]
+        return top_field
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
@@ -128,31 +147,75 @@ async def get_top_field_of_work(worker_id:str):
 @router.get("/gigs/{worker_id}")
 async def get_all_gigs_count(worker_id: str):
     try:
-        #get all the applications tied to a gig_worker
-        result = supabase.table(APPLICATION_TABLE).select('gig_id').eq(GIGWORKER_ID, worker_id).execute()
-        #extract just the gig_ids in the applications table belonging to a gig worker
-        gig_ids = [i['gig_id'] for i in result.data]
-        #get all the gigs in the gigs table tied to gig_id in applications table
-        result2 = supabase.table(GIG_TABLE).select('status').in_('gig_id',gig_ids).execute()
-        #count the number of gigs that are pending, past and present
-        status_counts = Counter(item['status'] for item in result2.data)
-        # Get counts with default 0 for missing statuses
-        pending = status_counts.get('in-progress', 0)
-        past = status_counts.get('completed', 0)
-        present = status_counts.get('open', 0)
-        return {"pending": pending, "past": past, "present": present}
+        return await gig_status_counts(await worker_gig_ids(worker_id))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+#the worker home screen in one round trip, the gig ids are resolved once and the rest runs concurrently
+@router.get("/dashboard/{worker_id}", response_model=WorkerDashboardSchema)
+async def get_worker_dashboard(worker_id: str, reviews_limit: int = Query(RECENT_REVIEWS_LIMIT, ge=0, le=50)) -> WorkerDashboardSchema:
+    try:
+        gig_ids = await worker_gig_ids(worker_id)
+        gig_counts, ratings_avg, recent_reviews, top_field = await asyncio.gather(
+            gig_status_counts(gig_ids),
+            worker_ratings_avg(worker_id),
+            worker_recent_reviews(gig_ids, reviews_limit),
+            worker_top_field(worker_id),
+        )
+        return ORJSONResponse({
+            "gig_counts": gig_counts,
+            "ratings_avg": ratings_avg,
+            "recent_reviews": recent_reviews,
+            "top_field": top_field,
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+#helpers shared by the dashboard and the single purpose endpoints above
+async def worker_gig_ids(worker_id: str) -> List[str]:
+    result = await supabase.table(APPLICATION_TABLE).select('gig_id').eq(GIGWORKER_ID, worker_id).execute()
+    return [i['gig_id'] for i in result.data]
+
+async def gig_status_counts(gig_ids: List[str]) -> dict:
+    counts = {}
+    if gig_ids:
+        #grouped by the gig_status_counts rpc, one row per status comes back
+        result = await supabase.rpc('gig_status_counts', {'p_gig_ids': gig_ids}).execute()
+        counts = {row['status']: row['gig_count'] for row in result.data}
+    return {"pending": counts.get('in-progress', 0), "past": counts.get('completed', 0), "present": counts.get('open', 0)}
+
+async def worker_ratings_avg(worker_id: str) -> float:
+    #kept up to date by the record_worker_rating rpc, so this is a single row lookup
+    result = await supabase.table(WORKER_RATING_TABLE).select('rating_avg').eq(GIGWORKER_ID, worker_id).execute()
+    #no row means the worker hasn't been rated yet
+    if len(result.data) == 0:
+        return 0.00
+    return result.data[0]['rating_avg']
+
+async def worker_recent_reviews(gig_ids: List[str], limit: int) -> List[dict]:
+    if not gig_ids or limit == 0:
+        return []
+    #gigs are created with an empty review, only ones the employer actually filled in count
+    result = await supabase.table(GIG_TABLE).select('gig_worker_review').in_('gig_id', gig_ids) \
+        .not_.is_('gig_worker_review', 'null').neq('gig_worker_review', '') \
+        .order('created_at', desc=True).limit(limit).execute()
+    return result.data
+
+async def worker_top_field(worker_id: str) -> Optional[dict]:
+    result = await supabase.table(GIGWORKER_TABLE).select('specialties').eq(USER_ID, worker_id).execute()
+    if len(result.data) == 0:
+        return None
+    return result.data[0]
     
 @router.get("/gigs/{worker_id}/all")
 async def get_all_gigs(worker_id: str):
     try:
         #get all the applications tied to a gig_worker
-        result = supabase.table(APPLICATION_TABLE).select('gig_id').eq(GIGWORKER_ID, worker_id).execute()
+        result = await supabase.table(APPLICATION_TABLE).select('gig_id').eq(GIGWORKER_ID, worker_id).execute()
         #extract just the gig_ids in the applications table belonging to a gig worker
         gig_ids = [i['gig_id'] for i in result.data]
         #get all the gigs in the gigs table tied to gig_id in applications table
-        result2 = supabase.table(GIG_TABLE).select('*').in_('gig_id',gig_ids).execute()
+        result2 = await supabase.table(GIG_TABLE).select('*').in_('gig_id',gig_ids).execute()
         return result2.data
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -172,13 +235,13 @@ async def upload_document(file: UploadFile = File(...)):
         # Upload the file to the Supabase bucket
         file_content = await file.read()
         file_name = f"{sanitize_filename(file.filename)}"
-        result =  supabase.storage.from_("resume").upload(file_name, file_content)
+        result =  await supabase.storage.from_("resume").upload(file_name, file_content)
         print(result)
         # if result.error:
         #     raise HTTPException(status_code=500, detail=result.error.message)
         
         # Get the public URL of the uploaded file
-        document_url = supabase.storage.from_("resume").get_public_url(file_name)
+        document_url = await supabase.storage.from_("resume").get_public_url(file_name)
         print(document_url)
         return {"document_url": document_url}
     except Exception as e:
@@ -189,7 +252,7 @@ async def download_document(file_name: str):
     try:
         print(file_name,'jfalsjfklsd')
         # Get the public URL of the uploaded file
-        document_url = supabase.storage.from_("resume").get_public_url(file_name)
+        document_url = await supabase.storage.from_("resume").get_public_url(file_name)
         return {"document_url": document_url}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,11 +1,19 @@
-from datetime import datetime
+from datetime import date, datetime
+import math
 import re
 import logging
-from typing import List, Optional
+from typing import List, Literal, Optional
 from uuid import UUID
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
+from fastapi.responses import ORJSONResponse
 from ..config import supabase
-from ..models.gigSchema import createGigSchema, updateGigSchema, responseGigSchema
+from ..etag import etag_for, etag_response
+from ..cache import entity_cache
+from ..geo_index import gig_geo_index
+from ..pagination import PageParams, fetch_page, stream_ndjson, wants_ndjson
+from ..projection import Projection
+from ..models.gigSchema import createGigSchema, updateGigSchema, responseGigSchema, nearbyGigSchema, gigStatus
+from ..models.paginationSchema import Page
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -13,21 +21,156 @@ router = APIRouter(prefix="/gigs", tags=["gigs"])
 GIG_TABLE:str = 'gig'
 GIG_ID:str = 'gig_id'
 CLIENT_ID:str = 'client_id'
+PAY_AMOUNT:str = 'pay_amount'
+MAX_RADIUS_KM:float = 500
 
-@router.get("/", response_model=list[responseGigSchema])
-async def get_gigs()-> list[responseGigSchema]:
+PROJECTION = Projection(responseGigSchema, relations={'client': 'client:client_id(*)'}, required=[GIG_ID, 'created_at'])
+
+@router.get("/", response_model=Page[responseGigSchema])
+async def get_gigs(request: Request, page: PageParams = Depends(), select: str = Depends(PROJECTION))-> Page[responseGigSchema]:
     try:
-        result = supabase.table(GIG_TABLE).select('*').execute()
-        print(type(result))
-        return result.data
+        #Accept: application/x-ndjson exports every row instead of one page
+        if wants_ndjson(request):
+            return stream_ndjson(lambda: supabase.table(GIG_TABLE).select(select), GIG_ID, after=page.after)
+        query = supabase.table(GIG_TABLE).select(select)
+        return ORJSONResponse(await fetch_page(query, page, GIG_ID))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
+#browse screen. every filter runs in postgres and only published gigs are ever returned,
+#see the gig_discovery migration for the partial indexes each filter / sort combination uses
+@router.get("/discover", response_model=Page[responseGigSchema])
+async def discover_gigs(
+    page: PageParams = Depends(),
+    select: str = Depends(PROJECTION),
+    category: Optional[List[str]] = Query(None),
+    status: Optional[gigStatus] = None,
+    min_pay: Optional[float] = Query(None, ge=0),
+    max_pay: Optional[float] = Query(None, ge=0),
+    starts_after: Optional[date] = None,
+    starts_before: Optional[date] = None,
+    ends_before: Optional[date] = None,
+    sort: Literal['recent', 'pay'] = 'recent',
+) -> Page[responseGigSchema]:
+    if min_pay is not None and max_pay is not None and min_pay > max_pay:
+        raise HTTPException(status_code=400, detail="min_pay can't be greater than max_pay")
+    try:
+        #the pay cursor needs pay_amount on every row
+        if sort == 'pay' and select != '*':
+            select = f'{select},{PAY_AMOUNT}'
+        query = supabase.table(GIG_TABLE).select(select).eq('is_published', True)
+        if category:
+            query = query.in_('category', category)
+        if status:
+            query = query.eq('status', status.value)
+        if min_pay is not None:
+            query = query.gte(PAY_AMOUNT, min_pay)
+        if max_pay is not None:
+            query = query.lte(PAY_AMOUNT, max_pay)
+        if starts_after:
+            query = query.gte('start_date', starts_after.isoformat())
+        if starts_before:
+            query = query.lte('start_date', starts_before.isoformat())
+        if ends_before:
+            query = query.lte('end_date', ends_before.isoformat())
+        if sort == 'pay':
+            #gigs without a parsable amount have nothing to rank by
+            query = query.not_.is_(PAY_AMOUNT, 'null')
+            return ORJSONResponse(await fetch_page(query, page, GIG_ID, sort_column=PAY_AMOUNT))
+        return ORJSONResponse(await fetch_page(query, page, GIG_ID))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+#published gigs within radius_km of a point, closest first
+@router.get("/nearby", response_model=List[nearbyGigSchema])
+async def get_nearby_gigs(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(25, gt=0, le=MAX_RADIUS_KM),
+    limit: int = Query(50, ge=1, le=100),
+    select: str = Depends(PROJECTION),
+) -> List[nearbyGigSchema]:
+    try:
+        if gig_geo_index.ready:
+            hits = gig_geo_index.nearby(lat, lng, radius_km, limit)
+        else:
+            dlat = radius_km / 111.0
+            dlng = min(dlat / max(math.cos(math.radians(lat)), 0.01), 180)
+            hits = await geo_fallback(lat - dlat, lng - dlng, lat + dlat, lng + dlng, lat, lng, limit, radius_km)
+        return ORJSONResponse(await gigs_with_distance(hits, select))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+#published gigs inside a bounding box (the visible map), closest to lat/lng or the box center first
+@router.get("/within", response_model=List[nearbyGigSchema])
+async def get_gigs_within(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lng: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lng: float = Query(..., ge=-180, le=180),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    limit: int = Query(50, ge=1, le=100),
+    select: str = Depends(PROJECTION),
+) -> List[nearbyGigSchema]:
+    if min_lat > max_lat:
+        raise HTTPException(status_code=400, detail="min_lat can't be greater than max_lat")
+    try:
+        #min_lng > max_lng is a box across the antimeridian
+        if lat is None or lng is None:
+            span = max_lng - min_lng if max_lng >= min_lng else max_lng + 360 - min_lng
+            lat, lng = (min_lat + max_lat) / 2, (min_lng + span / 2 + 180) % 360 - 180
+        if gig_geo_index.ready:
+            hits = gig_geo_index.within(min_lat, min_lng, max_lat, max_lng, lat, lng, limit)
+        else:
+            hits = await geo_fallback(min_lat, min_lng, max_lat, max_lng, lat, lng, limit)
+        return ORJSONResponse(await gigs_with_distance(hits, select))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def gigs_with_distance(hits: list, select: str) -> list:
+    #one query for the rows, then back into distance order
+    if not hits:
+        return []
+    result = await supabase.table(GIG_TABLE).select(select).in_(GIG_ID, [gig_id for gig_id, _ in hits]).execute()
+    rows = {row[GIG_ID]: row for row in result.data}
+    return [{**rows[gig_id], 'distance_km': round(distance, 3)} for gig_id, distance in hits if gig_id in rows]
+
+async def geo_fallback(min_lat, min_lng, max_lat, max_lng, lat, lng, limit, radius_km=None) -> list:
+    #the gigs_near rpc filters the box on the (latitude, longitude) index and orders by distance in
+    #the database, so a box with more gigs than fit in one response still comes back closest first
+    min_lng, max_lng = wrap_lng_range(min_lng, max_lng)
+    result = await supabase.rpc('gigs_near', {
+        'p_lat': lat, 'p_lng': lng,
+        'p_min_lat': max(min_lat, -90), 'p_max_lat': min(max_lat, 90),
+        'p_min_lng': min_lng, 'p_max_lng': max_lng,
+        'p_radius_km': radius_km, 'p_limit': limit,
+    }).execute()
+    return [(row[GIG_ID], row['distance_km']) for row in result.data]
+
+def wrap_lng_range(min_lng: float, max_lng: float):
+    #a radius box can run past +-180, its edges come back round the other side and min > max then
+    #means the box crosses the antimeridian, the same convention /within takes from the caller
+    if max_lng - min_lng >= 360:
+        return -180.0, 180.0
+    if -180 <= min_lng and max_lng <= 180:
+        return min_lng, max_lng
+    return (min_lng + 180) % 360 - 180, (max_lng + 180) % 360 - 180
+
 @router.get("/{gig_id}", response_model=responseGigSchema)
-async def get_gig(gig_id: str) -> responseGigSchema:
+async def get_gig(request: Request, gig_id: str, select: str = Depends(PROJECTION)) -> responseGigSchema:
     try:
-        result = supabase.table(GIG_TABLE).select('*').eq(GIG_ID, gig_id).execute()
-        return result.data[0]
+        #the etag is cached next to the row so a revalidation is answered without touching supabase
+        async def load():
+            result = await supabase.table(GIG_TABLE).select(select).eq(GIG_ID, gig_id).execute()
+            row = result.data[0]
+            return row, etag_for(GIG_TABLE, gig_id, row, whole_row=select == '*')
+        #only whole rows are cached, sparse or expanded reads go straight to supabase
+        if select != '*':
+            row, etag = await load()
+        else:
+            row, etag = await entity_cache.get_or_load(GIG_TABLE, gig_id, load)
+        return etag_response(request, row, etag)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -35,8 +178,9 @@ async def get_gig(gig_id: str) -> responseGigSchema:
 async def create_gig(gig: createGigSchema) -> responseGigSchema:
     try:
         logger.info(gig.model_dump())
-        result =  supabase.table(GIG_TABLE).insert(gig.model_dump(exclude_unset=True)).execute()
+        result =  await supabase.table(GIG_TABLE).insert(gig.model_dump(exclude_unset=True)).execute()
         logger.info(result)
+        gig_geo_index.apply_row(result.data[0])
         return result.data[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -45,7 +189,10 @@ async def create_gig(gig: createGigSchema) -> responseGigSchema:
 async def update_gig(gig_id: str, gig: updateGigSchema) -> responseGigSchema:
     try:
         print(gig.model_dump(exclude_unset=True,serialize_as_any=True))
-        result = supabase.table(GIG_TABLE).update(gig.model_dump(exclude_unset=True)).eq(GIG_ID, gig_id).execute()
+        result = await supabase.table(GIG_TABLE).update(gig.model_dump(exclude_unset=True)).eq(GIG_ID, gig_id).execute()
+        entity_cache.invalidate(GIG_TABLE, gig_id)
+        if result.data:
+            gig_geo_index.apply_row(result.data[0])
         return result.data[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -53,7 +200,9 @@ async def update_gig(gig_id: str, gig: updateGigSchema) -> responseGigSchema:
 @router.delete("/{gig_id}")
 async def delete_gig(gig_id: str):
     try:
-        result = supabase.table(GIG_TABLE).delete().eq(GIG_ID, gig_id).execute()
+        result = await supabase.table(GIG_TABLE).delete().eq(GIG_ID, gig_id).execute()
+        entity_cache.invalidate(GIG_TABLE, gig_id)
+        gig_geo_index.remove(gig_id)
         return {"message": "Gig deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -36,13 +36,13 @@ class Message(BaseModel):
 async def get_topics():
     try:
         # Get distinct topics from messages table
-        response = supabase.rpc(
+        response = await supabase.rpc(
             "get_distinct_topics"
         ).execute()
         
         # If the RPC doesn't exist, fallback to a direct query
         if not response.data:
-            response = supabase.table("messages").select("topic").execute()
+            response = await supabase.table("messages").select("topic").execute()
             topics = list(set(item["topic"] for item in response.data if "topic" in item))
         else:
             topics = [item["topic"] for item in response.data if "topic" in item]
@@ -51,7 +51,7 @@ async def get_topics():
     except Exception as e:
         # Fallback to direct query if RPC fails
         try:
-            response = supabase.table("messages").select("topic").execute()
+            response = await supabase.table("messages").select("topic").execute()
             topics = list(set(item["topic"] for item in response.data if "topic" in item))
             return {"topics": topics}
         except Exception as inner_e:
@@ -60,7 +60,7 @@ async def get_topics():
 async def get_topic_messages(topic: str):
     try:
         # Get messages for a specific topic
-        response = supabase.table("messages") \
+        response = await supabase.table("messages") \
             .select("*") \
             .eq("topic", topic) \
             .is_("private", "false") \
@@ -78,7 +78,7 @@ async def send_message(message: Message):
         
         # Use Supabase's built-in send function via RPC if available
         try:
-            response = supabase.rpc(
+            response = await supabase.rpc(
                 "send", 
                 {
                     "payload": json.dumps(message_data["payload"]),
@@ -91,10 +91,10 @@ async def send_message(message: Message):
             
             if getattr(response, 'error', None):
                 # Fallback to direct insert
-                response = supabase.table("messages").insert(message_data).execute()
+                response = await supabase.table("messages").insert(message_data).execute()
         except:
             # Fallback to direct insert
-            response = supabase.table("messages").insert(message_data).execute()
+            response = await supabase.table("messages").insert(message_data).execute()
             
         return response.data[0] if response.data else {"status": "sent"}
         
@@ -107,7 +107,7 @@ async def create_subscription(topic: str, user_id: str):
         subscription_id = f"{user_id}:{topic}"
         
         # Check if subscription already exists
-        response = supabase.table("subscription").select("*") \
+        response = await supabase.table("subscription").select("*") \
             .eq("subscription_id", subscription_id) \
             .execute()
             
@@ -120,7 +120,7 @@ async def create_subscription(topic: str, user_id: str):
                 "claims": {"user_id": user_id},
                 "claims_role": "authenticated"
             }
-            response = supabase.table("subscription").insert(subscription_data).execute()
+            response = await supabase.table("subscription").insert(subscription_data).execute()
             
         return {"status": "success", "subscription_id": subscription_id}
     except Exception as e:
@@ -130,7 +130,7 @@ async def remove_subscription(topic: str, user_id: str):
     try:
         subscription_id = f"{user_id}:{topic}"
         
-        response = supabase.table("subscription") \
+        response = await supabase.table("subscription") \
             .delete() \
             .eq("subscription_id", subscription_id) \
             .execute()
@@ -1,8 +1,14 @@
 from pydoc import Helper
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 import logging
+from typing import Dict
+from fastapi.responses import ORJSONResponse
 from ..config import supabase
-from ..models.postInteractionsSchema import CreatePostInteractionSchema, UpdatePostInteractionSchema, ResponsePostInteractionSchema
+from ..pagination import PageParams, fetch_page
+from ..write_behind import interaction_buffer
+from ..projection import Projection
+from ..models.postInteractionsSchema import CreatePostInteractionSchema, UpdatePostInteractionSchema, ResponsePostInteractionSchema, PostInteractionCountsRequestSchema, PostInteractionCountsSchema
+from ..models.paginationSchema import Page
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -10,19 +16,39 @@ router = APIRouter(prefix="/postInteractions", tags=["postInteractions"])
 POST_INTERACTIONS_TABLE:str = 'post_interactions'
 POST_INTERACTIONS_ID:str = 'id'
 
-@router.get("/", response_model=list[ResponsePostInteractionSchema])
-async def get_postInteractions()-> list[ResponsePostInteractionSchema]:
+PROJECTION = Projection(ResponsePostInteractionSchema, required=[POST_INTERACTIONS_ID, 'created_at'])
+
+@router.get("/", response_model=Page[ResponsePostInteractionSchema])
+async def get_postInteractions(page: PageParams = Depends(), select: str = Depends(PROJECTION))-> Page[ResponsePostInteractionSchema]:
     try:
-        result = supabase.table(POST_INTERACTIONS_TABLE).select('*').execute()
-        return result.data
+        query = supabase.table(POST_INTERACTIONS_TABLE).select(select)
+        return ORJSONResponse(await fetch_page(query, page, POST_INTERACTIONS_ID))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
+#counts per interaction_type for a batch of posts, plus whether the viewer has interacted with each.
+#the counts are maintained by a trigger on post_interactions, so this is one rpc call for the whole feed
+@router.post("/counts", response_model=Dict[str, PostInteractionCountsSchema])
+async def get_postInteraction_counts(body: PostInteractionCountsRequestSchema) -> Dict[str, PostInteractionCountsSchema]:
+    try:
+        params = {'p_post_ids': [str(i) for i in body.post_ids], 'p_viewer': str(body.viewer_id) if body.viewer_id else None}
+        result = await supabase.rpc('post_interaction_summary', params).execute()
+        return ORJSONResponse({
+            row['post_id']: {
+                "counts": row['counts'],
+                "viewer_interacted": bool(row['viewer_interactions']),
+                "viewer_interactions": row['viewer_interactions'],
+            }
+            for row in result.data
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{post_interaction_id}", response_model=ResponsePostInteractionSchema)
-async def get_postInteraction(post_interaction_id: str) -> ResponsePostInteractionSchema:
+async def get_postInteraction(post_interaction_id: str, select: str = Depends(PROJECTION)) -> ResponsePostInteractionSchema:
     try:
-        result = supabase.table(POST_INTERACTIONS_TABLE).select('*').eq(POST_INTERACTIONS_ID, post_interaction_id).execute()
-        return result.data[0]
+        result = await supabase.table(POST_INTERACTIONS_TABLE).select(select).eq(POST_INTERACTIONS_ID, post_interaction_id).execute()
+        return ORJSONResponse(result.data[0])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
@@ -30,7 +56,12 @@ async def get_postInteraction(post_interaction_id: str) -> ResponsePostInteracti
 async def create_postInteraction(postInteraction: CreatePostInteractionSchema) -> ResponsePostInteractionSchema:
     try:
         logger.info(postInteraction.model_dump())
-        result =  supabase.table(POST_INTERACTIONS_TABLE).insert(postInteraction.model_dump(exclude_unset=True)).execute()
+        row = postInteraction.model_dump(exclude_unset=True)
+        #likes and reactions are queued and written in bulk, the row is accepted but not stored yet.
+        #the response has no id, remove them with DELETE /{post_id}/{user_id}/{interaction_type}
+        if interaction_buffer.buffers(row.get('interaction_type')) and row.get('post_id') and row.get('user_id'):
+            return ORJSONResponse(interaction_buffer.add(row), status_code=202)
+        result =  await supabase.table(POST_INTERACTIONS_TABLE).insert(row).execute()
         logger.info(result)
         return result.data[0]
     except Exception as e:
@@ -39,7 +70,7 @@ async def create_postInteraction(postInteraction: CreatePostInteractionSchema) -
 @router.put("/{post_interaction_id}", response_model=ResponsePostInteractionSchema)
 async def update_postInteraction(post_interaction_id: str, postInteraction:  UpdatePostInteractionSchema) -> ResponsePostInteractionSchema:
     try:
-        result = supabase.table(POST_INTERACTIONS_TABLE).update(postInteraction.model_dump(exclude_unset=True)).eq(POST_INTERACTIONS_ID, post_interaction_id).execute()
+        result = await supabase.table(POST_INTERACTIONS_TABLE).update(postInteraction.model_dump(exclude_unset=True)).eq(POST_INTERACTIONS_ID, post_interaction_id).execute()
         return result.data[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -47,7 +78,19 @@ async def update_postInteraction(post_interaction_id: str, postInteraction:  Upd
 @router.delete("/{post_interaction_id}")
 async def delete_postInteraction(post_interaction_id: str):
     try:
-        result = supabase.table(POST_INTERACTIONS_TABLE).delete().eq(POST_INTERACTIONS_ID, post_interaction_id).execute()
+        result = await supabase.table(POST_INTERACTIONS_TABLE).delete().eq(POST_INTERACTIONS_ID, post_interaction_id).execute()
         return {"message": "Post Interaction deleted successfully"}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+#unlike / remove a reaction without knowing the row id
+@router.delete("/{post_id}/{user_id}/{interaction_type}")
+async def delete_postInteraction_by_key(post_id: str, user_id: str, interaction_type: str):
+    try:
+        if interaction_buffer.buffers(interaction_type):
+            interaction_buffer.remove(post_id, user_id, interaction_type)
+            return ORJSONResponse({"message": "Post Interaction deletion accepted"}, status_code=202)
+        result = await supabase.table(POST_INTERACTIONS_TABLE).delete().eq('post_id', post_id).eq('user_id', user_id).eq('interaction_type', interaction_type).execute()
+        return {"message": "Post Interaction deleted successfully"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,28 +1,93 @@
 from pydoc import Helper
-from fastapi import APIRouter, HTTPException
+import asyncio
+import heapq
+from datetime import datetime
+from itertools import islice
+from fastapi import APIRouter, Depends, HTTPException, Request
 import logging
+from fastapi.responses import ORJSONResponse
 from ..config import supabase
+from ..etag import etag_for, etag_response, if_none_match, version_etag
+from ..follow_graph import follow_graph
+from ..pagination import PageParams, fetch_page, keyset, to_page
+from ..projection import Projection
 from ..models.postsSchema import CreatePostSchema, UpdatePostSchema, ResponsePostSchema
+from ..models.paginationSchema import Page
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/posts", tags=["posts"])
 APPPLICATION_TABLE:str = 'user_posts'
 APPLICATION_ID:str = 'id'
+FOLLOWS_TABLE:str = 'follows'
+#followees per in_() query, keeps the url short and lets the chunks run concurrently
+FEED_AUTHOR_CHUNK:int = 50
+#postgrest caps a response at 1000 rows by default, longer follow lists are read in pages
+FOLLOWS_BATCH_SIZE:int = 1000
 
-@router.get("/", response_model=list[ResponsePostSchema])
-async def get_posts()-> list[ResponsePostSchema]:
+PROJECTION = Projection(ResponsePostSchema, required=[APPLICATION_ID, 'created_at'])
+
+@router.get("/", response_model=Page[ResponsePostSchema])
+async def get_posts(page: PageParams = Depends(), select: str = Depends(PROJECTION))-> Page[ResponsePostSchema]:
     try:
-        result = supabase.table(APPPLICATION_TABLE).select('*').execute()
-        return result.data
+        query = supabase.table(APPPLICATION_TABLE).select(select)
+        return ORJSONResponse(await fetch_page(query, page, APPLICATION_ID))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
+#home timeline, newest first. each chunk of followees is read through the (user_id, created_at, id)
+#index with the page's keyset seek and limit, then the sorted chunks are merged, so a page costs
+#about limit rows per chunk no matter how many posts exist
+@router.get("/feed/{viewer_id}", response_model=Page[ResponsePostSchema])
+async def get_feed(viewer_id: str, page: PageParams = Depends(), select: str = Depends(PROJECTION)) -> Page[ResponsePostSchema]:
+    try:
+        followees = await feed_authors(viewer_id)
+        if not followees:
+            return ORJSONResponse({"items": [], "next_cursor": None})
+        chunks = [followees[i:i + FEED_AUTHOR_CHUNK] for i in range(0, len(followees), FEED_AUTHOR_CHUNK)]
+        results = await asyncio.gather(*[
+            keyset(supabase.table(APPPLICATION_TABLE).select(select).in_('user_id', chunk), page, APPLICATION_ID).execute()
+            for chunk in chunks
+        ])
+        merged = heapq.merge(*[result.data for result in results], key=feed_order, reverse=True)
+        return ORJSONResponse(to_page(list(islice(merged, page.limit + 1)), page, APPLICATION_ID))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def feed_authors(viewer_id: str) -> list:
+    #the suggestion graph already holds every follow edge once it has loaded
+    if follow_graph.ready:
+        return follow_graph.following(viewer_id)
+    followees = []
+    while True:
+        query = supabase.table(FOLLOWS_TABLE).select('followed_id').eq('follower_id', viewer_id)
+        if followees:
+            query = query.gt('followed_id', followees[-1])
+        result = await query.order('followed_id').limit(FOLLOWS_BATCH_SIZE).execute()
+        followees.extend(row['followed_id'] for row in result.data)
+        if len(result.data) < FOLLOWS_BATCH_SIZE:
+            return followees
+
+def feed_order(row: dict):
+    #same order postgres used for each chunk, created_at desc with nulls first, then id desc
+    created_at = row.get('created_at')
+    if created_at is None:
+        return (1, datetime.min, row[APPLICATION_ID])
+    return (0, datetime.fromisoformat(created_at), row[APPLICATION_ID])
+
 @router.get("/{post_id}", response_model=ResponsePostSchema)
-async def get_post(post_id: str) -> ResponsePostSchema:
+async def get_post(request: Request, post_id: str, select: str = Depends(PROJECTION)) -> ResponsePostSchema:
     try:
-        result = supabase.table(APPPLICATION_TABLE).select('*').eq(APPLICATION_ID, post_id).execute()
-        return result.data[0]
+        #revalidations first probe just updated_at, the full row is only fetched when it changed
+        if select == '*' and request.headers.get('if-none-match'):
+            probe = await supabase.table(APPPLICATION_TABLE).select('updated_at').eq(APPLICATION_ID, post_id).execute()
+            if probe.data and probe.data[0].get('updated_at'):
+                etag = version_etag(APPPLICATION_TABLE, post_id, probe.data[0]['updated_at'])
+                if if_none_match(request, etag):
+                    return etag_response(request, None, etag)
+        result = await supabase.table(APPPLICATION_TABLE).select(select).eq(APPLICATION_ID, post_id).execute()
+        row = result.data[0]
+        return etag_response(request, row, etag_for(APPPLICATION_TABLE, post_id, row, whole_row=select == '*'))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
@@ -30,7 +95,7 @@ async def get_post(post_id: str) -> ResponsePostSchema:
 async def create_post(post: CreatePostSchema) -> ResponsePostSchema:
     try:
         logger.info(post.model_dump())
-        result =  supabase.table(APPPLICATION_TABLE).insert(post.model_dump(exclude_unset=True)).execute()
+        result =  await supabase.table(APPPLICATION_TABLE).insert(post.model_dump(exclude_unset=True)).execute()
         logger.info(result)
         return result.data[0]
     except Exception as e:
@@ -39,7 +104,7 @@ async def create_post(post: CreatePostSchema) -> ResponsePostSchema:
 @router.put("/{post_id}", response_model=ResponsePostSchema)
 async def update_post(post_id: str, post:  UpdatePostSchema) -> ResponsePostSchema:
     try:
-        result = supabase.table(APPPLICATION_TABLE).update(post.model_dump(exclude_unset=True)).eq(APPLICATION_ID, post_id).execute()
+        result = await supabase.table(APPPLICATION_TABLE).update(post.model_dump(exclude_unset=True)).eq(APPLICATION_ID, post_id).execute()
         return result.data[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -47,7 +112,7 @@ async def update_post(post_id: str, post:  UpdatePostSchema) -> ResponsePostSche
 @router.delete("/{post_id}")
 async def delete_post(post_id: str):
     try:
-        result = supabase.table(APPPLICATION_TABLE).delete().eq(APPLICATION_ID, post_id).execute()
+        result = await supabase.table(APPPLICATION_TABLE).delete().eq(APPLICATION_ID, post_id).execute()
         return {"message": "Post deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))  
@@ -3,13 +3,21 @@ import re
 import logging
 from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
+from fastapi.responses import ORJSONResponse
 from ..config import supabase
+from ..etag import etag_for, etag_response
+from ..cache import entity_cache
+from ..autocomplete import username_index, SUMMARY_COLUMNS
+from ..pagination import PageParams, fetch_page, quote_value
 from ..models.profileSchemas import CreateProfileSchema, UpdateProfileSchema, ResponseProfileSchema
+from ..models.paginationSchema import Page
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/profiles", tags=["profiles"])
+#columns /profiles/filters can sort on, the value goes into the keyset filter and order by
+SORTABLE_COLUMNS = frozenset(ResponseProfileSchema.model_fields) | {'created_at'}
 
 def sanitize_filename(filename: str) -> str:
     # Replace spaces with underscores and remove special characters
@@ -23,13 +31,13 @@ async def upload_avatar(file: UploadFile = File(...)):
         # Upload the file to the Supabase bucket
         file_content = await file.read()
         file_name = f"{sanitize_filename(file.filename)}"
-        result =  supabase.storage.from_("avatars").upload(file_name, file_content)
+        result =  await supabase.storage.from_("avatars").upload(file_name, file_content)
         print(result)
         # if result.error:
         #     raise HTTPException(status_code=500, detail=result.error.message)
         
         # Get the public URL of the uploaded file
-        avatar_url = supabase.storage.from_("avatars").get_public_url(file_name)
+        avatar_url = await supabase.storage.from_("avatars").get_public_url(file_name)
         print(avatar_url)
         return {"avatar_url": avatar_url}
     except Exception as e:
@@ -39,7 +47,7 @@ async def upload_avatar(file: UploadFile = File(...)):
 async def download_avatar(file_name: str):
     try:
         # Get the public URL of the uploaded file
-        avatar_url = supabase.storage.from_("avatars").get_public_url(file_name)
+        avatar_url = await supabase.storage.from_("avatars").get_public_url(file_name)
         return {"avatar_url": avatar_url}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -47,8 +55,7 @@ async def download_avatar(file_name: str):
 #untested
 @router.get("/filters")
 async def get_profiles_filters(
-    limit: int = 10,
-    offset: int = 0,
+    page: PageParams = Depends(),
     search: Optional[str] = None,
     sort: Optional[str] = "created_at",
     order: Optional[str] = "desc",
@@ -56,14 +63,15 @@ async def get_profiles_filters(
     age: Optional[int] = None,
     min_age: Optional[int] = None,
     max_age: Optional[int] = None,
-) -> list[ResponseProfileSchema]:
-
+) -> Page[ResponseProfileSchema]:
+    sort = sort or 'created_at'
+    if sort not in SORTABLE_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Cannot sort by {sort}, expected one of: {', '.join(sorted(SORTABLE_COLUMNS))}")
     try:
         query = supabase.table('profiles').select('*')
 
         if search: query = query.ilike('username', f'%{search}%')
         if is_employer: query = query.eq('is_employer', is_employer)
-        if age: query = query.eq('age', age)
         if age:
             query = query.eq('age', age)
         else:
@@ -72,31 +80,46 @@ async def get_profiles_filters(
                 query = query.gte('age', min_age)
             if max_age:
                 query = query.lte('age', max_age)
-        if sort and order: query = query.order(sort, order=order)
-
-        query = query.range(offset, offset + limit - 1)
 
-        result = query.execute()
+        #keyset instead of offset so deep pages don't rescan everything before them
+        return ORJSONResponse(await fetch_page(query, page, 'id', sort_column=sort, descending=order != 'asc'))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        return result.data or []
+#@-mention picker, profiles whose username or full name starts with q
+#served from the in-memory prefix index, a trigram backed prefix ilike covers the time it takes to load
+@router.get("/autocomplete")
+async def autocomplete_profiles(q: str = Query(..., min_length=1, max_length=50), limit: int = Query(10, ge=1, le=50)):
+    try:
+        if username_index.ready:
+            return ORJSONResponse(username_index.search(q, limit))
+        pattern = quote_value(q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+        #same columns the index keys on, so a cold start returns the same profiles
+        result = await supabase.table('profiles').select(SUMMARY_COLUMNS).or_(f"username.ilike.{pattern},full_name.ilike.{pattern}") \
+            .order('username').limit(limit).execute()
+        return ORJSONResponse(result.data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/")
 async def get_profiles():
     try:
-        result = supabase.table('profiles').select('*').execute()
+        result = await supabase.table('profiles').select('*').execute()
         return result.data[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{profile_id}")
-async def get_profile(profile_id: str) -> ResponseProfileSchema:
+async def get_profile(request: Request, profile_id: str) -> ResponseProfileSchema:
     try:
-        result = supabase.table('profiles').select('*').eq('id', profile_id).execute()
-        if not result.data:
-            raise HTTPException(status_code=404, detail="Profile not found")
-        return result.data[0]
+        #the etag is cached next to the row so a revalidation is answered without touching supabase
+        async def load():
+            result = await supabase.table('profiles').select('*').eq('id', profile_id).execute()
+            if not result.data:
+                raise HTTPException(status_code=404, detail="Profile not found")
+            return result.data[0], etag_for('profiles', profile_id, result.data[0])
+        row, etag = await entity_cache.get_or_load('profiles', profile_id, load)
+        return etag_response(request, row, etag)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -106,8 +129,9 @@ async def create_profile(profile: CreateProfileSchema):
         logger.info(profile.model_dump(),exc_info=True)
         #not sure why the config isn't converting to strings
         print(profile.model_dump())
-        result = supabase.table('profiles').insert(profile.model_dump()).execute()
+        result = await supabase.table('profiles').insert(profile.model_dump()).execute()
         logger.info(result)
+        username_index.upsert(result.data[0])
         return result.data[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -117,10 +141,12 @@ async def update_profile(profile_id: str, profile: UpdateProfileSchema) -> Respo
     try:
         print(profile_id)
         print(profile.model_dump(exclude_unset=True))
-        result = supabase.table('profiles').update(profile.model_dump(exclude_unset=True)).eq('id', profile_id).execute()
+        result = await supabase.table('profiles').update(profile.model_dump(exclude_unset=True)).eq('id', profile_id).execute()
+        entity_cache.invalidate('profiles', profile_id)
         print(result)
         if not result.data:
             raise HTTPException(status_code=404, detail="Profile not found")
+        username_index.upsert(result.data[0])
         return result.data[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -129,7 +155,9 @@ async def update_profile(profile_id: str, profile: UpdateProfileSchema) -> Respo
 @router.delete("/{profile_id}")
 async def delete_profile(profile_id: str):
     try:
-        result = supabase.table('profiles').delete().eq('id', profile_id).execute()
+        result = await supabase.table('profiles').delete().eq('id', profile_id).execute()
+        entity_cache.invalidate('profiles', profile_id)
+        username_index.remove(profile_id)
         if not result.data:
             raise HTTPException(status_code=404, detail="Profile not found")
         return {"message": "Profile deleted successfully"}
@@ -0,0 +1,32 @@
+import logging
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from ..config import supabase
+from ..pagination import PageParams, to_page
+from ..models.searchSchema import SearchKind, SearchResultSchema
+from ..models.paginationSchema import Page
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/search", tags=["search"])
+RESULT_ID:str = 'id'
+RANK:str = 'rank'
+
+#full-text search over published gigs (title, category, description) and posts (title, content).
+#matching and ranking happen in postgres against GIN indexes, pages are keyed on (rank, id)
+@router.get("/", response_model=Page[SearchResultSchema])
+async def search(q: str = Query(..., min_length=1, max_length=200), type: Optional[SearchKind] = None, page: PageParams = Depends()) -> Page[SearchResultSchema]:
+    try:
+        after_rank, after_id = page.after if page.after else (None, None)
+        params = {
+            'p_query': q,
+            'p_kind': type.value if type else None,
+            'p_limit': page.limit + 1,
+            'p_after_rank': after_rank,
+            'p_after_id': after_id,
+        }
+        result = await supabase.rpc('search_content', params).execute()
+        return ORJSONResponse(to_page(result.data, page, RESULT_ID, sort_column=RANK))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
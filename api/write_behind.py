@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import uuid
+from typing import Any, Dict, Optional, Tuple
+from .config import supabase, INTERACTION_FLUSH_SIZE, INTERACTION_FLUSH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+#must match the partial unique index in the write behind migration
+BUFFERED_INTERACTION_TYPES = frozenset({"like", "reaction"})
+INSERT = "insert"
+DELETE = "delete"
+
+InteractionKey = Tuple[str, str, str]
+
+class InteractionBuffer:
+    """Write-behind queue for likes and reactions.
+
+    Only the last operation per (post_id, user_id, interaction_type) is kept, so a
+    user toggling a like ten times before a flush costs at most one write. Pending
+    operations are applied in bulk with the apply_post_interaction_batch rpc when
+    flush_size are waiting or every flush_interval seconds, and stop() drains
+    whatever is left. The caller is answered with 202 before the row exists. An
+    upsert that lands on an existing row keeps that row's id, so the id isn't known
+    until after the flush and buffered rows are addressed by their key instead.
+    """
+
+    def __init__(self, client=supabase, flush_size: int = INTERACTION_FLUSH_SIZE, flush_interval: float = INTERACTION_FLUSH_INTERVAL):
+        self.client = client
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._pending: Dict[InteractionKey, Tuple[str, Optional[dict]]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+        self.queued = 0
+        self.coalesced = 0
+        self.flushed = 0
+        self.failed_flushes = 0
+
+    @staticmethod
+    def buffers(interaction_type: Optional[str]) -> bool:
+        return interaction_type in BUFFERED_INTERACTION_TYPES
+
+    def _queue(self, key: InteractionKey, op: str, row: Optional[dict]) -> None:
+        if key in self._pending:
+            self.coalesced += 1
+        self._pending[key] = (op, row)
+        self.queued += 1
+        if len(self._pending) >= self.flush_size:
+            self._wake.set()
+
+    def add(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue an insert, returns the accepted row without an id"""
+        row = dict(row)
+        #only used if this turns out to be a new row, a conflict keeps the stored id
+        row.setdefault("id", str(uuid.uuid4()))
+        self._queue((row["post_id"], row["user_id"], row["interaction_type"]), INSERT, row)
+        return {k: v for k, v in row.items() if k != "id"}
+
+    def remove(self, post_id: str, user_id: str, interaction_type: str) -> None:
+        #always queued, even over a pending insert, the row may already exist from an earlier flush
+        self._queue((post_id, user_id, interaction_type), DELETE, None)
+
+    async def flush(self) -> int:
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            upserts = [row for op, row in batch.values() if op == INSERT]
+            deletes = [
+                {"post_id": post_id, "user_id": user_id, "interaction_type": interaction_type}
+                for (post_id, user_id, interaction_type), (op, _) in batch.items() if op == DELETE
+            ]
+            try:
+                await self.client.rpc("apply_post_interaction_batch", {"p_upserts": upserts, "p_deletes": deletes}).execute()
+            except BaseException as e:
+                #cancelled mid-write too, replaying a batch that did land is harmless
+                #anything queued since the swap is newer and wins
+                for key, value in batch.items():
+                    self._pending.setdefault(key, value)
+                if isinstance(e, Exception):
+                    self.failed_flushes += 1
+                    logger.exception("interaction flush failed, %d operations requeued", len(batch))
+                raise
+            self.flushed += len(batch)
+            return len(batch)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:
+                #already logged and requeued, try again next interval
+                pass
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write out everything still pending"""
+        if self._task is not None:
+            #let a flush that is already writing finish instead of cancelling it halfway
+            self._stopping = True
+            self._wake.set()
+            await self._task
+            self._task = None
+        if self._pending:
+            try:
+                await self.flush()
+            except Exception:
+                logger.error("shutdown drain failed, %d interactions were not written", len(self._pending))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "queued": self.queued,
+            #operations replaced by a later one on the same key before they were written
+            "coalesced": self.coalesced,
+            "flushed": self.flushed,
+            "failed_flushes": self.failed_flushes,
+        }
+
+interaction_buffer = InteractionBuffer()
@@ -1,20 +1,26 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Set
 import json
+import logging
 from datetime import datetime
 import asyncio
 
 # Import your existing Supabase client and auth dependencies
-from .config import supabase
+from .config import supabase, close_supabase
+from .auth import authenticate
 from .routes.messaging import Message  # Import the Message model
 
+logger = logging.getLogger(__name__)
+
 # WebSocket connection manager
 class ConnectionManager:
     def __init__(self):
         self.active_connections: Dict[str, List[Dict[str, Any]]] = {}
         self.channel = None
+        # broadcasts scheduled from the realtime callback, held until they finish so they aren't garbage collected
+        self._broadcasts: Set[asyncio.Task] = set()
         
     async def connect(self, websocket: WebSocket, topic: str, user_id: str):
         await websocket.accept()
@@ -52,7 +58,7 @@ class ConnectionManager:
         
         try:
             # Check if subscription already exists
-            response = supabase.table("subscription").select("*") \
+            response = await supabase.table("subscription").select("*") \
                 .eq("subscription_id", subscription_id) \
                 .execute()
                 
@@ -65,7 +71,7 @@ class ConnectionManager:
                     "claims": {"user_id": user_id},
                     "claims_role": "authenticated"
                 }
-                supabase.table("subscription").insert(subscription_data).execute()
+                await supabase.table("subscription").insert(subscription_data).execute()
         except Exception as e:
             print(f"Error creating subscription: {str(e)}")
     
@@ -74,7 +80,7 @@ class ConnectionManager:
         subscription_id = f"{user_id}:{topic}"
         
         try:
-            supabase.table("subscription") \
+            await supabase.table("subscription") \
                 .delete() \
                 .eq("subscription_id", subscription_id) \
                 .execute()
@@ -94,24 +100,31 @@ class ConnectionManager:
                 except Exception as e:
                     print(f"Error sending message to client: {str(e)}")
     
+    def _broadcast_done(self, task: asyncio.Task):
+        self._broadcasts.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("message broadcast failed", exc_info=task.exception())
+
     async def start_supabase_listener(self):
         """Start listening to Supabase realtime events"""
         self.channel = supabase.channel('messages-channel')
         
         # Define callback for handling messages
-        async def handle_message_insert(payload):
+        # realtime calls this synchronously, so the broadcast is scheduled on the loop
+        def handle_message_insert(payload):
             # Extract message data from payload
-            new_message = payload.get('new', {})
+            new_message = payload.get('data', {}).get('record') or {}
             topic = new_message.get('topic')
             
             if topic and topic in self.active_connections:
                 # Broadcast to connected clients
-                await self.broadcast_message(new_message, topic)
+                task = asyncio.create_task(self.broadcast_message(new_message, topic))
+                self._broadcasts.add(task)
+                task.add_done_callback(self._broadcast_done)
         
         # Subscribe to INSERT events on the messages table
-        self.channel.on(
-            'postgres_changes',
-            event='INSERT',
+        self.channel.on_postgres_changes(
+            'INSERT',
             schema='public',
             table='messages',
             callback=handle_message_insert
@@ -140,6 +153,7 @@ async def lifespan(app: FastAPI):
     # Shutdown: Close any connections or resources
     print("WebSocket server shutting down")
     await manager.stop_supabase_listener()
+    await close_supabase()
 
 # Initialize FastAPI app with lifespan
 app = FastAPI(lifespan=lifespan)
@@ -156,10 +170,8 @@ app.add_middleware(
 # Function to verify the user's token
 async def verify_token(token: str):
     try:
-        user = supabase.auth.get_user(token)
-        if user:
-            return user.user.id
-        raise HTTPException(status_code=401, detail="Invalid token")
+        user = await authenticate(token)
+        return user.user.id
     except Exception as e:
         raise HTTPException(status_code=401, detail="Invalid token")
 
@@ -193,7 +205,7 @@ async def websocket_endpoint(websocket: WebSocket, topic: str):
         
         # Send join message to Supabase
         try:
-            supabase.rpc(
+            await supabase.rpc(
                 "send", 
                 {
                     "payload": json.dumps(join_message["payload"]),
@@ -205,7 +217,7 @@ async def websocket_endpoint(websocket: WebSocket, topic: str):
         except Exception as e:
             # Fallback to direct insert
             print(f"Error using RPC send: {str(e)}")
-            supabase.table("messages").insert(join_message).execute()
+            await supabase.table("messages").insert(join_message).execute()
         
         # Listen for messages from the client
         try:
@@ -228,7 +240,7 @@ async def websocket_endpoint(websocket: WebSocket, topic: str):
                 
                 # Send message to Supabase
                 try:
-                    supabase.rpc(
+                    await supabase.rpc(
                         "send", 
                         {
                             "payload": json.dumps(new_message["payload"]),
@@ -241,7 +253,7 @@ async def websocket_endpoint(websocket: WebSocket, topic: str):
                 except Exception as e:
                     # Fallback to direct insert
                     print(f"Error using RPC send: {str(e)}")
-                    supabase.table("messages").insert(new_message).execute()
+                    await supabase.table("messages").insert(new_message).execute()
                 
                 # Send message back to sender immediately for faster UI update
                 await websocket.send_json(new_message)
@@ -268,7 +280,7 @@ async def websocket_endpoint(websocket: WebSocket, topic: str):
             
             # Send leave message to Supabase
             try:
-                supabase.rpc(
+                await supabase.rpc(
                     "send", 
                     {
                         "payload": json.dumps(leave_message["payload"]),
@@ -280,7 +292,7 @@ async def websocket_endpoint(websocket: WebSocket, topic: str):
             except Exception as e:
                 # Fallback to direct insert
                 print(f"Error using RPC send: {str(e)}")
-                supabase.table("messages").insert(leave_message).execute()
+                await supabase.table("messages").insert(leave_message).execute()
             
     except HTTPException as he:
         await websocket.close(code=4001, reason=str(he.detail))
@@ -0,0 +1,82 @@
+"""Throughput of a route that runs a PostgREST query, sync client vs async client.
+
+A stub PostgREST server with a fixed latency runs on its own thread, and two copies of
+the same route are driven with N concurrent requests. "before" calls the blocking
+client inside `async def` like the routers used to; "after" awaits the async client.
+
+    python -m benchmarks.async_client_throughput --concurrency 100 --latency-ms 20
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from supabase import AsyncClient, create_client
+
+FAKE_KEY = "bench.bench.bench"
+
+
+def start_stub_postgrest(port: int, latency: float) -> uvicorn.Server:
+    stub = FastAPI()
+
+    @stub.get("/rest/v1/{table}")
+    async def select_rows(table: str):
+        await asyncio.sleep(latency)
+        return [{"gig_id": "00000000-0000-0000-0000-000000000000", "title": "bench"}]
+
+    server = uvicorn.Server(uvicorn.Config(stub, port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def build_app(mode: str, url: str) -> FastAPI:
+    app = FastAPI()
+    if mode == "before":
+        client = create_client(url, FAKE_KEY)
+
+        @app.get("/gigs/")
+        async def get_gigs():
+            return client.table("gig").select("*").execute().data
+    else:
+        client = AsyncClient(url, FAKE_KEY)
+
+        @app.get("/gigs/")
+        async def get_gigs():
+            return (await client.table("gig").select("*").execute()).data
+    return app
+
+
+async def drive(app: FastAPI, concurrency: int, rounds: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        await http.get("/gigs/")  # warm the connection pool
+        started = time.perf_counter()
+        for _ in range(rounds):
+            responses = await asyncio.gather(*[http.get("/gigs/") for _ in range(concurrency)])
+            assert all(r.status_code == 200 for r in responses)
+        elapsed = time.perf_counter() - started
+    return concurrency * rounds / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    start_stub_postgrest(args.port, args.latency_ms / 1000)
+    url = f"http://127.0.0.1:{args.port}"
+    for mode in ("before", "after"):
+        rps = asyncio.run(drive(build_app(mode, url), args.concurrency, args.rounds))
+        print(f"{mode:>6}: {rps:8.1f} req/s at {args.concurrency} concurrent requests")
+
+
+if __name__ == "__main__":
+    main()
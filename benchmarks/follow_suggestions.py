@@ -0,0 +1,76 @@
+"""Follow suggestions from the in-memory FollowGraph on a synthetic follow graph.
+
+Builds a graph of --edges follows between --profiles uuid profiles. Followees are drawn
+from a skewed distribution so a few accounts are very popular, like a real social graph.
+Reports load time, resident memory, suggestion latency for random viewers and the cost
+of the incremental add/remove the routes do on create/delete follow.
+
+    python -m benchmarks.follow_suggestions --profiles 100000 --edges 1000000
+"""
+import argparse
+import random
+import resource
+import statistics
+import time
+import uuid
+
+from api.follow_graph import FollowGraph
+
+SPECIALTIES = ["UI/UX", "Programming", "AI", "Animation", "Writing", "Marketing"]
+
+
+def synthetic_edges(profiles, edges, rng):
+    #popularity ~ 1/rank^0.8, sampled through cumulative weights
+    weights = [1 / (rank + 1) ** 0.8 for rank in range(len(profiles))]
+    followees = rng.choices(profiles, weights=weights, k=edges)
+    followers = rng.choices(profiles, k=edges)
+    return zip(followers, followees)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", type=int, default=100_000)
+    parser.add_argument("--edges", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    profiles = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(args.profiles)]
+    edges = list(synthetic_edges(profiles, args.edges, rng))
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    graph = FollowGraph()
+    start = time.perf_counter()
+    for follower, followed in edges:
+        graph.add(follower, followed)
+    for profile in profiles:
+        graph.set_specialty(profile, rng.choice(SPECIALTIES))
+    load_s = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"graph: {len(profiles):,} profiles, {graph.edges:,} edges, loaded in {load_s:.2f}s, "
+          f"~{(rss_after - rss_before) / 1024:.0f} MB")
+
+    viewers = rng.sample(profiles, args.queries)
+    timings = []
+    for viewer in viewers:
+        start = time.perf_counter()
+        graph.suggest(viewer, args.k)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(f"suggest top {args.k}: p50 {statistics.median(timings):.2f} ms, "
+          f"p99 {timings[int(len(timings) * 0.99) - 1]:.2f} ms, max {timings[-1]:.2f} ms")
+
+    pairs = [(rng.choice(profiles), rng.choice(profiles)) for _ in range(100_000)]
+    start = time.perf_counter()
+    for follower, followed in pairs:
+        graph.add(follower, followed)
+    for follower, followed in pairs:
+        graph.remove(follower, followed)
+    per_op_us = (time.perf_counter() - start) / (2 * len(pairs)) * 1e6
+    print(f"incremental add/remove: {per_op_us:.2f} us per op")
+
+
+if __name__ == "__main__":
+    main()
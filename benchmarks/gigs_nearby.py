@@ -0,0 +1,89 @@
+"""Radius and bounding box search over the in-memory GeoIndex with synthetic gigs.
+
+Places --gigs published gigs around a set of cities (gaussian spread, plus a uniform
+sprinkle everywhere else), then times /gigs/nearby style lookups at a few radii and a
+map-viewport /gigs/within lookup. The last line is the same radius query done as a
+linear scan over every point, which is what downloading all gigs amounted to.
+
+    python -m benchmarks.gigs_nearby --gigs 500000
+"""
+import argparse
+import random
+import resource
+import statistics
+import time
+import uuid
+
+from api.geo_index import GeoIndex, haversine_km
+
+CITIES = [
+    (40.7128, -74.0060), (34.0522, -118.2437), (41.8781, -87.6298), (29.7604, -95.3698),
+    (51.5074, -0.1278), (48.8566, 2.3522), (35.6762, 139.6503), (-33.8688, 151.2093),
+    (19.4326, -99.1332), (-23.5505, -46.6333), (28.6139, 77.2090), (1.3521, 103.8198),
+]
+
+
+def synthetic_points(count, rng):
+    for i in range(count):
+        if i % 10 == 0:
+            lat, lng = rng.uniform(-60, 70), rng.uniform(-180, 180)
+        else:
+            city_lat, city_lng = rng.choice(CITIES)
+            lat, lng = rng.gauss(city_lat, 0.3), rng.gauss(city_lng, 0.3)
+        yield str(uuid.UUID(int=rng.getrandbits(128))), max(min(lat, 90), -90), (lng + 180) % 360 - 180
+
+
+def report(label, timings):
+    timings.sort()
+    print(f"{label}: p50 {statistics.median(timings):.2f} ms, p99 {timings[max(int(len(timings) * 0.99) - 1, 0)]:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--gigs", type=int, default=500_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    points = list(synthetic_points(args.gigs, rng))
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    index = GeoIndex()
+    start = time.perf_counter()
+    for gig_id, lat, lng in points:
+        index.add(gig_id, lat, lng)
+    load_s = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"index: {len(index):,} gigs in {index.stats()['cells']:,} cells, built in {load_s:.2f}s, "
+          f"~{(rss_after - rss_before) / 1024:.0f} MB")
+
+    #searches centred near a city, where the dense (and slow) cases are
+    centres = [(rng.gauss(lat, 0.2), rng.gauss(lng, 0.2)) for lat, lng in rng.choices(CITIES, k=args.queries)]
+    for radius_km in (5, 25, 100):
+        timings = []
+        for lat, lng in centres:
+            start = time.perf_counter()
+            index.nearby(lat, lng, radius_km, args.limit)
+            timings.append((time.perf_counter() - start) * 1000)
+        report(f"nearby {radius_km:>3} km, top {args.limit}", timings)
+
+    timings = []
+    for lat, lng in centres:
+        start = time.perf_counter()
+        index.within(lat - 0.05, lng - 0.08, lat + 0.05, lng + 0.08, lat, lng, args.limit)
+        timings.append((time.perf_counter() - start) * 1000)
+    report("within ~11x13 km viewport", timings)
+
+    timings = []
+    for lat, lng in centres[:10]:
+        start = time.perf_counter()
+        sorted((haversine_km(lat, lng, p_lat, p_lng), gig_id) for gig_id, p_lat, p_lng in points
+               if haversine_km(lat, lng, p_lat, p_lng) <= 25)[:args.limit]
+        timings.append((time.perf_counter() - start) * 1000)
+    report("linear scan 25 km", timings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Cost of serializing 10k application rows, per-field serializers vs the shared base.
+
+"before" is BaseApplicationSchema as it was, with a field_serializer for each UUID and
+datetime column. "after" is the current schema on BaseDBModel, where pydantic-core
+serializes those types natively. The last two lines compare what a list endpoint
+used to do (validate every row against response_model, then dump it) with sending
+the postgrest rows straight through orjson.
+
+    python -m benchmarks.model_dump_cost --rows 10000
+"""
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+from uuid import UUID
+
+import orjson
+from pydantic import BaseModel, field_serializer
+
+from api.models.applicationsSchema import ApplicationStatus, ResponseApplicationSchema
+
+
+class LegacyApplicationSchema(BaseModel):
+    application_id: Optional[UUID] = None
+    created_at: datetime = None
+    status: ApplicationStatus = None
+    submitted_at: datetime = None
+    updated_at: datetime = None
+    got_hired: bool = False
+    has_been_viewed: bool = False
+    has_accepted_hire_offer: bool = False
+    gig_id: UUID = None
+    worker_id: UUID = None
+
+    @field_serializer('application_id')
+    def serialize_application_id(self, application_id: UUID) -> str:
+        return str(application_id)
+
+    @field_serializer('created_at')
+    def serialize_created_at(self, created_at: datetime) -> str:
+        return created_at.isoformat()
+
+    @field_serializer('submitted_at')
+    def serialize_submitted_at(self, submitted_at: datetime) -> str:
+        return submitted_at.isoformat()
+
+    @field_serializer('updated_at')
+    def serialize_updated_at(self, updated_at: datetime) -> str:
+        return updated_at.isoformat()
+
+    @field_serializer('gig_id')
+    def serialize_gig_id(self, gig_id: UUID) -> str:
+        return str(gig_id)
+
+    @field_serializer('worker_id')
+    def serialize_worker_id(self, worker_id: UUID) -> str:
+        return str(worker_id)
+
+
+def make_rows(count: int) -> list:
+    now = datetime.now(timezone.utc).isoformat()
+    return [
+        {
+            "application_id": str(uuid.uuid4()),
+            "created_at": now,
+            "status": "in_progress",
+            "submitted_at": now,
+            "updated_at": now,
+            "got_hired": False,
+            "has_been_viewed": True,
+            "has_accepted_hire_offer": False,
+            "gig_id": str(uuid.uuid4()),
+            "worker_id": str(uuid.uuid4()),
+        }
+        for _ in range(count)
+    ]
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    legacy = [LegacyApplicationSchema.model_validate(r) for r in rows]
+    current = [ResponseApplicationSchema.model_validate(r) for r in rows]
+
+    results = {
+        "model_dump, per-field serializers": best_of(args.repeat, lambda: [m.model_dump() for m in legacy]),
+        "model_dump, BaseDBModel": best_of(args.repeat, lambda: [m.model_dump() for m in current]),
+        "validate + dump + json.dumps (old list path)": best_of(args.repeat, lambda: json.dumps([LegacyApplicationSchema.model_validate(r).model_dump() for r in rows])),
+        "orjson.dumps of raw rows (new list path)": best_of(args.repeat, lambda: orjson.dumps(rows)),
+    }
+    for name, seconds in results.items():
+        print(f"{name:<46} {seconds * 1000:8.2f} ms per {args.rows} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Autocomplete latency of the in-memory PrefixIndex at a million profiles.
+
+Builds --profiles synthetic profiles (username + full name), then times top-N prefix
+lookups for 1 to 4 character prefixes, which is what the @-mention picker sends while
+someone types. For comparison it also times the scan an unindexed
+"username ilike 'abc%'" boils down to, on the same data.
+
+    python -m benchmarks.username_autocomplete --profiles 1000000
+"""
+import argparse
+import random
+import resource
+import statistics
+import string
+import time
+import uuid
+
+from api.autocomplete import PrefixIndex
+
+SYLLABLES = ["al", "an", "ar", "be", "ca", "da", "el", "en", "jo", "ka", "li", "ma", "mi", "na", "ri", "sa", "ta", "vi", "yu", "zo"]
+
+
+def synthetic_profiles(count, rng):
+    for _ in range(count):
+        first = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 3))).capitalize()
+        last = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))).capitalize()
+        username = f"{first.lower()}{rng.choice(['', '_', '.'])}{last.lower()}{rng.randint(0, 9999)}"
+        yield {"id": str(uuid.UUID(int=rng.getrandbits(128))), "username": username, "full_name": f"{first} {last}", "avatar_url": None}
+
+
+def percentile(sorted_values, pct):
+    return sorted_values[max(int(len(sorted_values) * pct) - 1, 0)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = list(synthetic_profiles(args.profiles, rng))
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    index = PrefixIndex()
+    start = time.perf_counter()
+    index.bulk_load(rows)
+    load_s = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"index: {len(index):,} profiles, {index.stats()['keys']:,} keys, built in {load_s:.2f}s, "
+          f"~{(rss_after - rss_before) / 1024:.0f} MB")
+
+    prefixes = []
+    for _ in range(args.queries):
+        name = rng.choice(rows)["username"]
+        prefixes.append(name[:rng.randint(1, 4)])
+    prefixes += ["".join(rng.choices(string.ascii_lowercase, k=3)) for _ in range(args.queries // 10)]
+
+    timings = []
+    for prefix in prefixes:
+        start = time.perf_counter()
+        index.search(prefix, args.limit)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(f"index top {args.limit}: p50 {statistics.median(timings):.3f} ms, p99 {percentile(timings, 0.99):.3f} ms, "
+          f"max {timings[-1]:.3f} ms over {len(timings):,} prefixes")
+
+    scan_timings = []
+    for prefix in prefixes[:20]:
+        start = time.perf_counter()
+        [r for r in rows if r["username"].lower().startswith(prefix)][:args.limit]
+        scan_timings.append((time.perf_counter() - start) * 1000)
+    print(f"full scan (ilike without an index): p50 {statistics.median(scan_timings):.1f} ms")
+
+    start = time.perf_counter()
+    for row in rows[:10_000]:
+        index.upsert({**row, "username": row["username"] + "x"})
+    print(f"incremental upsert: {(time.perf_counter() - start) / 10_000 * 1e6:.1f} us per profile write")
+
+
+if __name__ == "__main__":
+    main()
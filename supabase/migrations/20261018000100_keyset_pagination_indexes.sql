@@ -0,0 +1,13 @@
+-- Indexes backing the keyset (created_at, primary key) pagination used by the list endpoints.
+-- Each one matches the "order=created_at.desc,<pk>.desc" that api/pagination.py sends,
+-- so every page is a short index range scan no matter how deep the cursor is.
+
+create index if not exists gig_created_at_keyset_idx on public.gig (created_at desc, gig_id desc);
+create index if not exists gig_worker_created_at_keyset_idx on public.gig_worker (created_at desc, worker_id desc);
+create index if not exists client_created_at_keyset_idx on public.client (created_at desc, client_id desc);
+create index if not exists applications_created_at_keyset_idx on public.applications (created_at desc, application_id desc);
+create index if not exists document_created_at_keyset_idx on public.document (created_at desc, document_id desc);
+create index if not exists financial_account_created_at_keyset_idx on public.financial_account (created_at desc, account_id desc);
+create index if not exists user_posts_created_at_keyset_idx on public.user_posts (created_at desc, id desc);
+create index if not exists post_interactions_created_at_keyset_idx on public.post_interactions (created_at desc, id desc);
+create index if not exists profiles_created_at_keyset_idx on public.profiles (created_at desc, id desc);
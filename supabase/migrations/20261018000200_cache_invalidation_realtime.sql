@@ -0,0 +1,4 @@
+-- Publish row changes on the cached tables so every API instance's change feed
+-- (api/changefeed.py) can evict stale entries. The default replica identity is
+-- enough: DELETE events only need the primary key in old_record.
+alter publication supabase_realtime add table public.gig, public.profiles, public.client, public.gig_worker;
@@ -0,0 +1,11 @@
+-- The entity ETags (api/etag.py) are derived from updated_at, so it has to move on
+-- every write, not only when a client remembers to send it.
+create extension if not exists moddatetime schema extensions;
+
+drop trigger if exists handle_updated_at on public.profiles;
+create trigger handle_updated_at before update on public.profiles
+    for each row execute procedure extensions.moddatetime(updated_at);
+
+drop trigger if exists handle_updated_at on public.user_posts;
+create trigger handle_updated_at before update on public.user_posts
+    for each row execute procedure extensions.moddatetime(updated_at);
@@ -0,0 +1,58 @@
+-- Running rating totals per gig worker so the average is a single row lookup
+-- instead of applications -> gig -> average in Python on every read.
+create table if not exists public.worker_rating_stats (
+    worker_id uuid primary key references public.gig_worker (worker_id) on delete cascade,
+    rating_count integer not null default 0,
+    rating_sum numeric not null default 0,
+    rating_avg numeric generated always as (case when rating_count > 0 then rating_sum / rating_count else 0 end) stored,
+    updated_at timestamptz not null default now()
+);
+
+alter table public.worker_rating_stats enable row level security;
+drop policy if exists "worker rating stats are readable" on public.worker_rating_stats;
+create policy "worker rating stats are readable" on public.worker_rating_stats for select using (true);
+
+-- A gig's rating belongs to the worker(s) hired on it. Gigs are created with
+-- gig_worker_rating = 0, so 0 and null both mean not rated yet (ratings start at 1).
+insert into public.worker_rating_stats (worker_id, rating_count, rating_sum)
+select a.worker_id, count(nullif(g.gig_worker_rating, 0)), coalesce(sum(nullif(g.gig_worker_rating, 0)), 0)
+from public.applications a
+join public.gig g on g.gig_id = a.gig_id
+where a.got_hired and nullif(g.gig_worker_rating, 0) is not null
+group by a.worker_id
+on conflict (worker_id) do update
+    set rating_count = excluded.rating_count,
+        rating_sum = excluded.rating_sum,
+        updated_at = now();
+
+-- Writes the gig's worker rating and folds it into the aggregate in one transaction.
+-- The gig row is locked first, so concurrent ratings of the same gig can't double count,
+-- and re-rating a gig replaces the old value instead of adding a new one. The stored
+-- value is compared with the same rule as the backfill: 0 (the column default) is unrated.
+create or replace function public.record_worker_rating(p_gig_id uuid, p_rating numeric)
+returns void
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_previous numeric;
+    v_rating numeric := nullif(p_rating, 0);
+begin
+    select nullif(gig_worker_rating, 0) into v_previous from gig where gig_id = p_gig_id for update;
+    if not found then
+        raise exception 'gig % not found', p_gig_id using errcode = 'P0002';
+    end if;
+
+    update gig set gig_worker_rating = p_rating where gig_id = p_gig_id;
+
+    insert into worker_rating_stats as s (worker_id, rating_count, rating_sum)
+    select a.worker_id, (v_rating is not null)::int, coalesce(v_rating, 0)
+    from applications a
+    where a.gig_id = p_gig_id and a.got_hired
+    on conflict (worker_id) do update
+        set rating_count = s.rating_count + (v_rating is not null)::int - (v_previous is not null)::int,
+            rating_sum = s.rating_sum + coalesce(v_rating, 0) - coalesce(v_previous, 0),
+            updated_at = now();
+end;
+$$;
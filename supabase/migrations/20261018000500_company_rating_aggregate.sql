@@ -0,0 +1,96 @@
+-- client.company_rating / client.individual_ratings become the single running aggregate
+-- for a company, maintained in the database so concurrent ratings can't lose updates.
+-- company_rating_sum keeps the exact total so the average never drifts.
+-- The backfill folds gig ratings into totals that also hold ratings from employer updates,
+-- which aren't stored one by one and so can't be recomputed. It runs only in the transaction
+-- that creates company_rating_sum, so applying this file again can't count anything twice.
+do $$
+begin
+    if exists (
+        select 1 from information_schema.columns
+        where table_schema = 'public' and table_name = 'client' and column_name = 'company_rating_sum'
+    ) then
+        return;
+    end if;
+
+    alter table public.client add column company_rating_sum numeric not null default 0;
+
+    -- Ratings collected from employer updates so far.
+    update public.client
+    set company_rating_sum = coalesce(company_rating, 0) * coalesce(individual_ratings, 0)
+    where coalesce(individual_ratings, 0) > 0;
+
+    -- Plus ratings gig workers already left on gigs. Gigs are created with company_rating = 0,
+    -- so 0 and null both mean not rated yet (ratings start at 1).
+    with gig_ratings as (
+        select client_id, count(*) as rating_count, sum(company_rating) as rating_sum
+        from public.gig
+        where nullif(company_rating, 0) is not null
+        group by client_id
+    )
+    update public.client c
+    set company_rating_sum = c.company_rating_sum + g.rating_sum,
+        individual_ratings = coalesce(c.individual_ratings, 0) + g.rating_count,
+        company_rating = (c.company_rating_sum + g.rating_sum)
+            / nullif(coalesce(c.individual_ratings, 0) + g.rating_count, 0)
+    from gig_ratings g
+    where g.client_id = c.client_id;
+end;
+$$;
+
+-- Adds one rating to a company. The update is a single statement, so the row lock
+-- serialises concurrent callers.
+create or replace function public.add_company_rating(p_client_id uuid, p_rating numeric)
+returns public.client
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_client client;
+begin
+    update client
+    set company_rating_sum = company_rating_sum + p_rating,
+        individual_ratings = coalesce(individual_ratings, 0) + 1,
+        company_rating = (company_rating_sum + p_rating) / (coalesce(individual_ratings, 0) + 1)
+    where client_id = p_client_id
+    returning * into v_client;
+    if not found then
+        raise exception 'client % not found', p_client_id using errcode = 'P0002';
+    end if;
+    return v_client;
+end;
+$$;
+
+-- Sets the rating a gig worker gave the company on a gig and folds it into the company
+-- aggregate. Re-rating a gig replaces the old value. As in the backfill, a gig.company_rating
+-- of 0 (the column default) or null means unrated, and rating a gig 0 clears its rating.
+create or replace function public.record_company_rating(p_gig_id uuid, p_rating numeric)
+returns public.client
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_previous numeric;
+    v_rating numeric := nullif(p_rating, 0);
+    v_client_id uuid;
+    v_client client;
+begin
+    select nullif(company_rating, 0), client_id into v_previous, v_client_id from gig where gig_id = p_gig_id for update;
+    if not found then
+        raise exception 'gig % not found', p_gig_id using errcode = 'P0002';
+    end if;
+
+    update gig set company_rating = p_rating where gig_id = p_gig_id;
+
+    update client
+    set company_rating_sum = company_rating_sum + coalesce(v_rating, 0) - coalesce(v_previous, 0),
+        individual_ratings = coalesce(individual_ratings, 0) + (v_rating is not null)::int - (v_previous is not null)::int,
+        company_rating = (company_rating_sum + coalesce(v_rating, 0) - coalesce(v_previous, 0))
+            / nullif(coalesce(individual_ratings, 0) + (v_rating is not null)::int - (v_previous is not null)::int, 0)
+    where client_id = v_client_id
+    returning * into v_client;
+    return v_client;
+end;
+$$;
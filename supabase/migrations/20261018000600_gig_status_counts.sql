@@ -0,0 +1,12 @@
+-- Status histogram for a set of gigs, grouped in the database so the API gets back
+-- one row per status instead of every gig's status.
+create or replace function public.gig_status_counts(p_gig_ids uuid[])
+returns table (status text, gig_count bigint)
+language sql
+stable
+as $$
+    select g.status::text, count(*)
+    from public.gig g
+    where g.gig_id = any(p_gig_ids)
+    group by g.status;
+$$;
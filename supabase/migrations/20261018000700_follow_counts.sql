@@ -0,0 +1,73 @@
+-- Per-profile follower / following counters so the count endpoints are a primary key
+-- lookup instead of counting follows rows. A trigger on follows keeps them in step with
+-- every insert and delete, inside the same transaction as the follow itself.
+create table if not exists public.follow_counts (
+    profile_id uuid primary key,
+    followers_count bigint not null default 0,
+    following_count bigint not null default 0
+);
+
+alter table public.follow_counts enable row level security;
+drop policy if exists "follow counts are readable" on public.follow_counts;
+create policy "follow counts are readable" on public.follow_counts for select using (true);
+
+-- Both sides of a follow are looked up by one id, these also serve the count fallback.
+create index if not exists follows_follower_id_idx on public.follows (follower_id, followed_id);
+create index if not exists follows_followed_id_idx on public.follows (followed_id, follower_id);
+
+insert into public.follow_counts (profile_id, followers_count, following_count)
+select profile_id, sum(followers), sum(following)
+from (
+    select followed_id as profile_id, count(*) as followers, 0 as following from public.follows group by followed_id
+    union all
+    select follower_id, 0, count(*) from public.follows group by follower_id
+) c
+group by profile_id
+on conflict (profile_id) do update
+    set followers_count = excluded.followers_count,
+        following_count = excluded.following_count;
+
+-- The two counter rows are always locked in profile_id order. A follows B while B follows A
+-- touches the same two rows, in the opposite order if it went followed then follower, and
+-- the two transactions could deadlock.
+create or replace function public.maintain_follow_counts()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_profile_id uuid;
+    v_followers bigint;
+    v_following bigint;
+begin
+    if tg_op = 'INSERT' then
+        for v_profile_id, v_followers, v_following in
+            select * from (values (new.followed_id, 1::bigint, 0::bigint), (new.follower_id, 0::bigint, 1::bigint)) v
+            order by 1
+        loop
+            insert into follow_counts as c (profile_id, followers_count, following_count)
+            values (v_profile_id, v_followers, v_following)
+            on conflict (profile_id) do update
+                set followers_count = c.followers_count + v_followers,
+                    following_count = c.following_count + v_following;
+        end loop;
+        return new;
+    end if;
+
+    for v_profile_id, v_followers, v_following in
+        select * from (values (old.followed_id, 1::bigint, 0::bigint), (old.follower_id, 0::bigint, 1::bigint)) v
+        order by 1
+    loop
+        update follow_counts
+        set followers_count = greatest(followers_count - v_followers, 0),
+            following_count = greatest(following_count - v_following, 0)
+        where profile_id = v_profile_id;
+    end loop;
+    return old;
+end;
+$$;
+
+drop trigger if exists maintain_follow_counts on public.follows;
+create trigger maintain_follow_counts after insert or delete on public.follows
+    for each row execute procedure public.maintain_follow_counts();
@@ -0,0 +1,5 @@
+-- The follow suggestion graph (api/follow_graph.py) is kept in memory on every instance,
+-- so follows written through one instance have to reach the others through realtime.
+-- DELETE events need both ids in old_record, not just the primary key.
+alter table public.follows replica identity full;
+alter publication supabase_realtime add table public.follows;
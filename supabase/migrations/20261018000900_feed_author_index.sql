@@ -0,0 +1,5 @@
+-- The home feed (GET /posts/feed/{viewer_id}) reads each followee's newest posts with
+-- "user_id in (...) order by created_at desc, id desc limit n". With this index every
+-- author is a short backward range scan, so the cost follows the page size rather
+-- than how many posts the authors have ever written.
+create index if not exists user_posts_author_feed_idx on public.user_posts (user_id, created_at desc, id desc);
@@ -0,0 +1,64 @@
+-- Per-post interaction totals by interaction_type (like, comment, ...), kept current by a
+-- trigger on post_interactions so a post's counts are read, not counted.
+create table if not exists public.post_interaction_counts (
+    post_id uuid not null,
+    interaction_type text not null,
+    interaction_count bigint not null default 0,
+    primary key (post_id, interaction_type)
+);
+
+alter table public.post_interaction_counts enable row level security;
+drop policy if exists "post interaction counts are readable" on public.post_interaction_counts;
+create policy "post interaction counts are readable" on public.post_interaction_counts for select using (true);
+
+-- "has the viewer interacted with these posts" is a lookup on this index.
+create index if not exists post_interactions_post_user_idx on public.post_interactions (post_id, user_id);
+
+insert into public.post_interaction_counts (post_id, interaction_type, interaction_count)
+select post_id, interaction_type, count(*)
+from public.post_interactions
+where post_id is not null and interaction_type is not null
+group by post_id, interaction_type
+on conflict (post_id, interaction_type) do update set interaction_count = excluded.interaction_count;
+
+create or replace function public.maintain_post_interaction_counts()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    if tg_op in ('DELETE', 'UPDATE') and old.post_id is not null and old.interaction_type is not null then
+        update post_interaction_counts
+        set interaction_count = greatest(interaction_count - 1, 0)
+        where post_id = old.post_id and interaction_type = old.interaction_type;
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') and new.post_id is not null and new.interaction_type is not null then
+        insert into post_interaction_counts as c (post_id, interaction_type, interaction_count)
+        values (new.post_id, new.interaction_type, 1)
+        on conflict (post_id, interaction_type) do update set interaction_count = c.interaction_count + 1;
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists maintain_post_interaction_counts on public.post_interactions;
+create trigger maintain_post_interaction_counts after insert or delete or update of post_id, interaction_type on public.post_interactions
+    for each row execute procedure public.maintain_post_interaction_counts();
+
+-- Counts for a batch of posts plus which interaction types the viewer has on each,
+-- one row per requested post.
+create or replace function public.post_interaction_summary(p_post_ids uuid[], p_viewer uuid default null)
+returns table (post_id uuid, counts jsonb, viewer_interactions text[])
+language sql
+stable
+as $$
+    select ids.post_id,
+        coalesce((select jsonb_object_agg(c.interaction_type, c.interaction_count)
+                  from public.post_interaction_counts c
+                  where c.post_id = ids.post_id and c.interaction_count > 0), '{}'::jsonb),
+        coalesce((select array_agg(distinct i.interaction_type)
+                  from public.post_interactions i
+                  where i.post_id = ids.post_id and i.user_id = p_viewer), '{}')
+    from unnest(p_post_ids) as ids(post_id);
+$$;
@@ -0,0 +1,35 @@
+-- Likes and reactions are written behind (api/write_behind.py): the API coalesces them
+-- in memory and applies a whole batch with one call to apply_post_interaction_batch.
+-- A user has at most one like / one reaction per post, which is what lets a retried or
+-- repeated write be absorbed by the unique index instead of creating duplicates.
+-- Comments and other types can still repeat, so the index is partial.
+delete from public.post_interactions a
+using public.post_interactions b
+where a.interaction_type in ('like', 'reaction')
+    and a.post_id = b.post_id
+    and a.user_id = b.user_id
+    and a.interaction_type = b.interaction_type
+    and (a.created_at, a.id) > (b.created_at, b.id);
+
+create unique index if not exists post_interactions_one_per_user_idx
+    on public.post_interactions (post_id, user_id, interaction_type)
+    where interaction_type in ('like', 'reaction');
+
+-- Deletes first, then inserts. A key only ever appears in one of the two lists because
+-- the buffer keeps just the last operation per (post_id, user_id, interaction_type).
+create or replace function public.apply_post_interaction_batch(p_upserts jsonb, p_deletes jsonb)
+returns void
+language plpgsql
+as $$
+begin
+    delete from public.post_interactions i
+    using jsonb_to_recordset(coalesce(p_deletes, '[]')) as d(post_id uuid, user_id uuid, interaction_type text)
+    where i.post_id = d.post_id and i.user_id = d.user_id and i.interaction_type = d.interaction_type;
+
+    insert into public.post_interactions (id, post_id, user_id, interaction_type, interaction_details)
+    select u.id, u.post_id, u.user_id, u.interaction_type, coalesce(u.interaction_details, '{}')
+    from jsonb_to_recordset(coalesce(p_upserts, '[]')) as u(id uuid, post_id uuid, user_id uuid, interaction_type text, interaction_details jsonb)
+    on conflict (post_id, user_id, interaction_type) where interaction_type in ('like', 'reaction')
+    do update set interaction_details = excluded.interaction_details;
+end;
+$$;
@@ -0,0 +1,73 @@
+-- Full-text search for GET /search (api/routes/search.py).
+-- The documents are built by immutable functions and indexed as expressions instead of
+-- stored generated columns, so "select *" on gig and user_posts doesn't start shipping a
+-- tsvector with every row. search_content uses the same expressions, which is what lets
+-- the planner answer the @@ match from the GIN indexes.
+create or replace function public.gig_search_document(p_title text, p_category text, p_description text)
+returns tsvector
+language sql
+immutable
+as $$
+    select setweight(to_tsvector('english'::regconfig, coalesce(p_title, '')), 'A')
+        || setweight(to_tsvector('english'::regconfig, coalesce(p_category, '')), 'B')
+        || setweight(to_tsvector('english'::regconfig, coalesce(p_description, '')), 'C');
+$$;
+
+create or replace function public.post_search_document(p_title text, p_content text)
+returns tsvector
+language sql
+immutable
+as $$
+    select setweight(to_tsvector('english'::regconfig, coalesce(p_title, '')), 'A')
+        || setweight(to_tsvector('english'::regconfig, coalesce(p_content, '')), 'B');
+$$;
+
+-- Drafts are never searchable, so the gig index only covers published rows.
+create index if not exists gig_search_idx on public.gig
+    using gin (public.gig_search_document(title, category::text, description))
+    where is_published;
+create index if not exists user_posts_search_idx on public.user_posts
+    using gin (public.post_search_document(post_title, post_content));
+
+-- Ranked matches, best first, paged by (rank, id). p_kind limits the search to 'gig' or
+-- 'post', null searches both. Snippets are only built for the rows that are returned.
+create or replace function public.search_content(
+    p_query text,
+    p_kind text default null,
+    p_limit integer default 20,
+    p_after_rank real default null,
+    p_after_id uuid default null
+)
+returns table (kind text, id uuid, title text, snippet text, rank real, created_at timestamptz)
+language sql
+stable
+as $$
+    with q as (
+        select websearch_to_tsquery('english'::regconfig, p_query) as query
+    ),
+    matches as (
+        select 'gig'::text as kind, g.gig_id as id, g.title, g.description as body, g.created_at,
+            ts_rank(public.gig_search_document(g.title, g.category::text, g.description), q.query) as rank
+        from public.gig g, q
+        where (p_kind is null or p_kind = 'gig')
+            and g.is_published
+            and public.gig_search_document(g.title, g.category::text, g.description) @@ q.query
+        union all
+        select 'post'::text, p.id, p.post_title, p.post_content, p.created_at,
+            ts_rank(public.post_search_document(p.post_title, p.post_content), q.query)
+        from public.user_posts p, q
+        where (p_kind is null or p_kind = 'post')
+            and public.post_search_document(p.post_title, p.post_content) @@ q.query
+    ),
+    page as (
+        select * from matches m
+        where p_after_rank is null or (m.rank, m.id) < (p_after_rank, p_after_id)
+        order by m.rank desc, m.id desc
+        limit p_limit
+    )
+    select page.kind, page.id, page.title,
+        ts_headline('english'::regconfig, coalesce(page.body, ''), q.query, 'MaxWords=30, MinWords=10'),
+        page.rank, page.created_at
+    from page, q
+    order by page.rank desc, page.id desc;
+$$;
@@ -0,0 +1,13 @@
+-- @-mention autocomplete (GET /profiles/autocomplete) is answered from the in-memory
+-- prefix index in api/autocomplete.py, which matches username or full_name. Until that
+-- index has loaded it falls back to "username ilike 'abc%' or full_name ilike 'abc%'",
+-- and /profiles/filters runs "username ilike '%abc%'". Trigram indexes serve both (the
+-- "or" becomes a bitmap or of the two); a plain b-tree can't help a case-insensitive or
+-- leading-wildcard match.
+create extension if not exists pg_trgm schema extensions;
+
+create index if not exists profiles_username_trgm_idx on public.profiles
+    using gin (username extensions.gin_trgm_ops);
+
+create index if not exists profiles_full_name_trgm_idx on public.profiles
+    using gin (full_name extensions.gin_trgm_ops);
@@ -0,0 +1,44 @@
+-- Indexes behind GET /gigs/discover (api/routes/gigs.py).
+--
+-- Every discover query has "is_published = true", so all of these are partial indexes
+-- over published gigs only: drafts never take up space in them and can't leak into the
+-- browse screen. Each one ends in the keyset order the endpoint pages with:
+--   sort=recent  -> order by created_at desc, gig_id desc
+--   sort=pay     -> order by pay_amount desc, gig_id desc (gigs without an amount are left out)
+--
+--   gig_discover_recent_idx           no filters / date filters, newest first
+--   gig_discover_category_recent_idx  category=... newest first
+--   gig_discover_status_recent_idx    status=... newest first
+--   gig_discover_pay_idx              sort=pay, min_pay / max_pay
+--   gig_discover_category_pay_idx     category=... sort=pay
+--   gig_discover_start_date_idx       starts_after / starts_before
+
+-- payment_details is free-form json, so the amount is pulled out into a real numeric
+-- column. Anything that isn't a plain number (after dropping "$" and thousands commas)
+-- becomes null instead of failing the insert.
+create or replace function public.safe_amount(p_value text)
+returns numeric
+language sql
+immutable
+as $$
+    select case
+        when regexp_replace(p_value, '[$,[:space:]]', '', 'g') ~ '^-?[0-9]+(\.[0-9]+)?$'
+        then regexp_replace(p_value, '[$,[:space:]]', '', 'g')::numeric
+    end;
+$$;
+
+alter table public.gig add column if not exists pay_amount numeric
+    generated always as (public.safe_amount(payment_details ->> 'amount')) stored;
+
+create index if not exists gig_discover_recent_idx on public.gig (created_at desc, gig_id desc)
+    where is_published;
+create index if not exists gig_discover_category_recent_idx on public.gig (category, created_at desc, gig_id desc)
+    where is_published;
+create index if not exists gig_discover_status_recent_idx on public.gig (status, created_at desc, gig_id desc)
+    where is_published;
+create index if not exists gig_discover_pay_idx on public.gig (pay_amount desc, gig_id desc)
+    where is_published and pay_amount is not null;
+create index if not exists gig_discover_category_pay_idx on public.gig (category, pay_amount desc, gig_id desc)
+    where is_published and pay_amount is not null;
+create index if not exists gig_discover_start_date_idx on public.gig (start_date)
+    where is_published;
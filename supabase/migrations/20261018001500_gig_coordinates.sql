@@ -0,0 +1,73 @@
+-- Gigs near me (GET /gigs/nearby, /gigs/within). gig.location is free-form json, so the
+-- point is normalized into latitude / longitude columns. The API fills them on every
+-- write (baseGigSchema.normalize_coordinates); this backfills existing rows using the
+-- same spellings: lat|latitude + lng|lon|long|longitude, or a GeoJSON point.
+alter table public.gig add column if not exists latitude double precision;
+alter table public.gig add column if not exists longitude double precision;
+
+with points as (
+    select gig_id,
+        case when jsonb_typeof(location -> 'coordinates') = 'array'
+            then location -> 'coordinates' ->> 1
+            else coalesce(location ->> 'lat', location ->> 'latitude') end as lat,
+        case when jsonb_typeof(location -> 'coordinates') = 'array'
+            then location -> 'coordinates' ->> 0
+            else coalesce(location ->> 'lng', location ->> 'lon', location ->> 'long', location ->> 'longitude') end as lng
+    from public.gig
+    where location is not null and latitude is null
+)
+update public.gig g
+set latitude = public.safe_amount(p.lat)::double precision,
+    longitude = public.safe_amount(p.lng)::double precision
+from points p
+where g.gig_id = p.gig_id
+    and public.safe_amount(p.lat) between -90 and 90
+    and public.safe_amount(p.lng) between -180 and 180;
+
+alter table public.gig drop constraint if exists gig_latitude_range;
+alter table public.gig add constraint gig_latitude_range check (latitude between -90 and 90);
+alter table public.gig drop constraint if exists gig_longitude_range;
+alter table public.gig add constraint gig_longitude_range check (longitude between -180 and 180);
+
+-- The radius search is served from the in-memory grid in api/geo_index.py. This index
+-- covers the bounding box query the API falls back to while that grid is loading.
+create index if not exists gig_published_coordinates_idx on public.gig (latitude, longitude)
+    where is_published and latitude is not null;
+
+-- The fallback itself: published gigs in the box, closest to (p_lat, p_lng) first, so the
+-- database does the distance ordering and a dense box can't hand back an arbitrary subset.
+-- p_min_lng > p_max_lng is a box across the antimeridian. p_radius_km is null for /within,
+-- where the box alone is the bound. Distances use the same haversine as the grid.
+create or replace function public.gigs_near(
+    p_lat double precision,
+    p_lng double precision,
+    p_min_lat double precision,
+    p_max_lat double precision,
+    p_min_lng double precision,
+    p_max_lng double precision,
+    p_radius_km double precision,
+    p_limit integer
+)
+returns table (gig_id uuid, distance_km double precision)
+language sql
+stable
+set search_path = public
+as $$
+    select d.gig_id, d.distance_km
+    from (
+        select g.gig_id,
+            2 * 6371.0088 * asin(least(1, sqrt(
+                power(sin(radians(g.latitude - p_lat) / 2), 2)
+                + cos(radians(p_lat)) * cos(radians(g.latitude)) * power(sin(radians(g.longitude - p_lng) / 2), 2)
+            ))) as distance_km
+        from gig g
+        where g.is_published and g.latitude is not null
+            and g.latitude between p_min_lat and p_max_lat
+            and case when p_min_lng <= p_max_lng
+                then g.longitude between p_min_lng and p_max_lng
+                else g.longitude >= p_min_lng or g.longitude <= p_max_lng end
+    ) d
+    where p_radius_km is null or d.distance_km <= p_radius_km
+    order by d.distance_km, d.gig_id
+    limit p_limit;
+$$;
@@ -0,0 +1,45 @@
+-- record_company_rating against gigs that still hold the 0.00 default rating.
+-- Run with `supabase test db`.
+begin;
+select plan(4);
+
+-- fixture rows only carry the columns the rpc reads, foreign keys to profiles are skipped
+set local session_replication_role = replica;
+-- one rating of 4 so far
+insert into public.client (client_id, company_rating, individual_ratings, company_rating_sum)
+    values ('00000000-0000-0000-0000-00000000c001', 4, 1, 4);
+insert into public.gig (gig_id, client_id, company_rating) values
+    ('00000000-0000-0000-0000-00000000b001', '00000000-0000-0000-0000-00000000c001', 0),
+    ('00000000-0000-0000-0000-00000000b002', '00000000-0000-0000-0000-00000000c001', 0);
+set local session_replication_role = origin;
+
+select public.record_company_rating('00000000-0000-0000-0000-00000000b001', 5);
+select results_eq(
+    $$select individual_ratings::numeric, company_rating_sum::numeric, company_rating::numeric from public.client where client_id = '00000000-0000-0000-0000-00000000c001'$$,
+    $$values (2::numeric, 9::numeric, 4.5::numeric)$$,
+    'rating a gig at the default adds a rating'
+);
+
+select public.record_company_rating('00000000-0000-0000-0000-00000000b001', 3);
+select results_eq(
+    $$select individual_ratings::numeric, company_rating_sum::numeric, company_rating::numeric from public.client where client_id = '00000000-0000-0000-0000-00000000c001'$$,
+    $$values (2::numeric, 7::numeric, 3.5::numeric)$$,
+    're-rating a gig replaces its rating'
+);
+
+select public.record_company_rating('00000000-0000-0000-0000-00000000b002', 0);
+select results_eq(
+    $$select individual_ratings::numeric, company_rating_sum::numeric from public.client where client_id = '00000000-0000-0000-0000-00000000c001'$$,
+    $$values (2::numeric, 7::numeric)$$,
+    'rating 0 leaves an unrated gig unrated'
+);
+
+select public.record_company_rating('00000000-0000-0000-0000-00000000b001', 0);
+select results_eq(
+    $$select individual_ratings::numeric, company_rating_sum::numeric, company_rating::numeric from public.client where client_id = '00000000-0000-0000-0000-00000000c001'$$,
+    $$values (1::numeric, 4::numeric, 4::numeric)$$,
+    'rating 0 clears an existing rating'
+);
+
+select * from finish();
+rollback;
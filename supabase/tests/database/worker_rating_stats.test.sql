@@ -0,0 +1,56 @@
+-- record_worker_rating against gigs that still hold the 0.00 default rating.
+-- Run with `supabase test db`.
+begin;
+select plan(5);
+
+-- fixture rows only carry the columns the rpc reads, foreign keys to profiles/client are skipped
+set local session_replication_role = replica;
+insert into public.gig_worker (worker_id) values ('00000000-0000-0000-0000-00000000a001');
+insert into public.gig (gig_id, gig_worker_rating) values
+    ('00000000-0000-0000-0000-00000000b001', 4),
+    ('00000000-0000-0000-0000-00000000b002', 0),
+    ('00000000-0000-0000-0000-00000000b003', 0);
+insert into public.applications (gig_id, worker_id, got_hired) values
+    ('00000000-0000-0000-0000-00000000b001', '00000000-0000-0000-0000-00000000a001', true),
+    ('00000000-0000-0000-0000-00000000b002', '00000000-0000-0000-0000-00000000a001', true),
+    ('00000000-0000-0000-0000-00000000b003', '00000000-0000-0000-0000-00000000a001', true);
+-- what the backfill leaves: the rated gig counts, the two gigs at the default don't
+insert into public.worker_rating_stats (worker_id, rating_count, rating_sum)
+    values ('00000000-0000-0000-0000-00000000a001', 1, 4);
+set local session_replication_role = origin;
+
+select public.record_worker_rating('00000000-0000-0000-0000-00000000b002', 5);
+select results_eq(
+    $$select rating_count, rating_sum::numeric, rating_avg::numeric from public.worker_rating_stats where worker_id = '00000000-0000-0000-0000-00000000a001'$$,
+    $$values (2, 9::numeric, 4.5::numeric)$$,
+    'rating a gig at the default adds a rating'
+);
+
+select public.record_worker_rating('00000000-0000-0000-0000-00000000b002', 3);
+select results_eq(
+    $$select rating_count, rating_sum::numeric from public.worker_rating_stats where worker_id = '00000000-0000-0000-0000-00000000a001'$$,
+    $$values (2, 7::numeric)$$,
+    're-rating a gig replaces its rating'
+);
+select is(
+    (select gig_worker_rating::numeric from public.gig where gig_id = '00000000-0000-0000-0000-00000000b002'),
+    3::numeric,
+    'the gig keeps the latest rating'
+);
+
+select public.record_worker_rating('00000000-0000-0000-0000-00000000b003', 0);
+select results_eq(
+    $$select rating_count, rating_sum::numeric from public.worker_rating_stats where worker_id = '00000000-0000-0000-0000-00000000a001'$$,
+    $$values (2, 7::numeric)$$,
+    'rating 0 leaves an unrated gig unrated'
+);
+
+select public.record_worker_rating('00000000-0000-0000-0000-00000000b001', 0);
+select results_eq(
+    $$select rating_count, rating_sum::numeric from public.worker_rating_stats where worker_id = '00000000-0000-0000-0000-00000000a001'$$,
+    $$values (1, 3::numeric)$$,
+    'rating 0 clears an existing rating'
+);
+
+select * from finish();
+rollback;
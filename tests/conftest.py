@@ -0,0 +1,8 @@
+import os
+import sys
+
+#api.config builds the supabase client at import time, it only needs a url and key to exist
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test.anon.key")
+os.environ.setdefault("CHANGE_FEED_SOURCE", "local")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,56 @@
+import asyncio
+
+from api.cache import TTLCache
+
+
+def test_invalidate_during_load_skips_stale_value():
+    async def scenario():
+        cache = TTLCache(max_entries=10, default_ttl=60)
+        started, release = asyncio.Event(), asyncio.Event()
+        versions = iter(["old", "new"])
+
+        async def load():
+            value = next(versions)
+            started.set()
+            await release.wait()
+            return value
+
+        reading = asyncio.create_task(cache.get_or_load("gig", load))
+        await started.wait()
+        #a PUT lands while the GET is still reading the old row
+        cache.invalidate("gig")
+        release.set()
+        assert await reading == "old"
+        assert cache.get("gig") is None
+        assert await cache.get_or_load("gig", load) == "new"
+        assert cache.get("gig") == "new"
+
+    asyncio.run(asyncio.wait_for(scenario(), 5))
+
+
+def test_reader_after_invalidate_does_not_join_stale_load():
+    async def scenario():
+        cache = TTLCache(max_entries=10, default_ttl=60)
+        first_release, second_release = asyncio.Event(), asyncio.Event()
+
+        async def old():
+            await first_release.wait()
+            return "old"
+
+        async def new():
+            await second_release.wait()
+            return "new"
+
+        first = asyncio.create_task(cache.get_or_load("gig", old))
+        await asyncio.sleep(0)
+        cache.invalidate("gig")
+        second = asyncio.create_task(cache.get_or_load("gig", new))
+        await asyncio.sleep(0)
+        #the newer load finishes first, the older one must not overwrite it
+        second_release.set()
+        assert await second == "new"
+        first_release.set()
+        assert await first == "old"
+        assert cache.get("gig") == "new"
+
+    asyncio.run(asyncio.wait_for(scenario(), 5))
@@ -0,0 +1,41 @@
+import asyncio
+
+from api.cache import EntityCache
+from api.changefeed import ChangeFeed, LocalChangeSource
+
+GIG_ID = "3f1d2c4b-5a6e-4f70-8b9c-0d1e2f3a4b5c"
+
+
+async def cached_gig(cache, title):
+    async def load():
+        return {"gig_id": GIG_ID, "title": title}
+    return await cache.get_or_load("gig", GIG_ID, load)
+
+
+def test_update_and_delete_evict_and_notify():
+    async def scenario():
+        cache = EntityCache({"gig": 60}, max_entries=10)
+        source = LocalChangeSource()
+        feed = ChangeFeed(source, cache=cache, table_keys={"gig": "gig_id"})
+        seen = []
+        feed.add_listener(seen.append)
+        await feed.start()
+
+        await cached_gig(cache, "old")
+        source.publish("gig", "UPDATE", record={"gig_id": GIG_ID, "title": "new"})
+        assert (await cached_gig(cache, "new"))["title"] == "new"
+
+        source.publish("gig", "DELETE", old_record={"gig_id": GIG_ID})
+        assert (await cached_gig(cache, "reloaded"))["title"] == "reloaded"
+
+        #not a watched event, the cached row stays
+        source.publish("gig", "INSERT", record={"gig_id": GIG_ID})
+        assert (await cached_gig(cache, "ignored"))["title"] == "reloaded"
+
+        await feed.stop()
+        return feed, seen
+
+    feed, seen = asyncio.run(scenario())
+    assert [change["type"] for change in seen] == ["UPDATE", "DELETE"]
+    assert seen[0]["record"]["title"] == "new"
+    assert feed.stats()["evicted"] == 2
@@ -0,0 +1,33 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.follow_graph import FollowGraph
+from api.routes import follows
+
+VIEWER = "00000000-0000-0000-0000-00000000a001"
+FOLLOWED = "00000000-0000-0000-0000-00000000a002"
+FOLLOWER = "00000000-0000-0000-0000-00000000a003"
+MUTUAL = "00000000-0000-0000-0000-00000000a004"
+STRANGER = "00000000-0000-0000-0000-00000000a005"
+
+
+def test_relationships_from_loaded_graph(monkeypatch):
+    graph = FollowGraph()
+    graph.add(VIEWER, FOLLOWED)
+    graph.add(FOLLOWER, VIEWER)
+    graph.add(VIEWER, MUTUAL)
+    graph.add(MUTUAL, VIEWER)
+    graph.ready = True
+    monkeypatch.setattr(follows, "follow_graph", graph)
+    app = FastAPI()
+    app.include_router(follows.router)
+
+    response = TestClient(app).post(f"/follows/{VIEWER}/relationships", json={"ids": [FOLLOWED, FOLLOWER, MUTUAL, STRANGER]})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        FOLLOWED: {"following": True, "followed_by": False},
+        FOLLOWER: {"following": False, "followed_by": True},
+        MUTUAL: {"following": True, "followed_by": True},
+        STRANGER: {"following": False, "followed_by": False},
+    }
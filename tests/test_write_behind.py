@@ -0,0 +1,84 @@
+import asyncio
+
+from api.write_behind import InteractionBuffer
+
+POST_ID = "7d6c1a0e-7a53-4a8e-9f0e-0c3b1c8f2a11"
+USER_ID = "0b7f2c55-3f3e-4d7a-8a6e-5a2f8c9d1e22"
+
+
+class StubRpc:
+    def __init__(self, client, params):
+        self.client = client
+        self.params = params
+
+    async def execute(self):
+        self.client.calls.append(self.params)
+        await self.client.release.wait()
+
+
+class StubClient:
+    """Records apply_post_interaction_batch calls, each one blocks until release is set"""
+
+    def __init__(self):
+        self.calls = []
+        self.release = asyncio.Event()
+
+    def rpc(self, fn, params):
+        assert fn == "apply_post_interaction_batch"
+        return StubRpc(self, params)
+
+
+def like():
+    return {"post_id": POST_ID, "user_id": USER_ID, "interaction_type": "like"}
+
+
+def test_add_response_has_no_id():
+    buffer = InteractionBuffer(client=StubClient())
+    accepted = buffer.add(like())
+    assert "id" not in accepted
+    assert accepted["post_id"] == POST_ID
+
+
+def test_stop_waits_for_running_flush():
+    async def scenario():
+        client = StubClient()
+        buffer = InteractionBuffer(client=client, flush_size=1, flush_interval=60)
+        buffer.start()
+        buffer.add(like())
+        while not client.calls:
+            await asyncio.sleep(0)
+        stopping = asyncio.create_task(buffer.stop())
+        await asyncio.sleep(0.01)
+        assert not stopping.done()
+        client.release.set()
+        await stopping
+        return client, buffer
+
+    client, buffer = asyncio.run(scenario())
+    assert len(client.calls) == 1
+    assert buffer.stats()["flushed"] == 1
+    assert buffer.stats()["pending"] == 0
+
+
+def test_cancelled_flush_requeues_batch():
+    async def scenario():
+        client = StubClient()
+        buffer = InteractionBuffer(client=client, flush_interval=60)
+        buffer.add(like())
+        flushing = asyncio.create_task(buffer.flush())
+        while not client.calls:
+            await asyncio.sleep(0)
+        flushing.cancel()
+        try:
+            await flushing
+        except asyncio.CancelledError:
+            pass
+        assert buffer.stats()["pending"] == 1
+        client.release.set()
+        await buffer.stop()
+        return client, buffer
+
+    client, buffer = asyncio.run(scenario())
+    assert len(client.calls) == 2
+    assert buffer.stats()["pending"] == 0
+    assert buffer.stats()["failed_flushes"] == 0